@@ -0,0 +1,55 @@
+"""Benchmark per-call Bedrock client construction against the shared client.
+
+No AWS calls are made: this measures what ``generate_insights`` paid before
+invoking a model, i.e. building ``boto3.client("bedrock-runtime")`` on every
+call versus looking up the cached, pooled client.
+
+Run from the repository root:
+    python -m benchmarks.bench_bedrock_client
+    python -m benchmarks.bench_bedrock_client --calls 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import boto3
+
+from tools.bedrock_insights.client import clear_client_cache, get_bedrock_client
+
+
+def _time_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def run(calls: int, region: str) -> None:
+    fresh = _time_per_call(
+        lambda: boto3.client("bedrock-runtime", region_name=region), calls)
+
+    clear_client_cache()
+    start = time.perf_counter()
+    get_bedrock_client(region)
+    first = time.perf_counter() - start
+    shared = _time_per_call(lambda: get_bedrock_client(region), calls * 100)
+
+    print(f"{'mode':<22} {'us/call':>12}")
+    print(f"{'new client per call':<22} {fresh * 1e6:12.0f}")
+    print(f"{'shared (first build)':<22} {first * 1e6:12.0f}")
+    print(f"{'shared (cached)':<22} {shared * 1e6:12.2f}")
+    print(f"saved per call: {(fresh - shared) * 1e3:.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--region", default="us-east-1")
+    args = parser.parse_args()
+    run(args.calls, args.region)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+"""Benchmark ProductCatalog lookups against the old linear list scan.
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog
+    python -m benchmarks.bench_catalog --sizes 1000 100000 1000000 --lookups 20000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List
+
+from services.product_service.catalog import Product, ProductCatalog
+
+
+def _linear_get(products: List[Product], product_id: int):
+    for p in products:
+        if p.id == product_id:
+            return p
+    return None
+
+
+def _time_per_op(fn, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def run(sizes: List[int], lookups: int, linear_max: int) -> None:
+    print(f"{'size':>10} {'build s':>9} {'get ns/op':>10} {'linear ns/op':>13}")
+    for size in sizes:
+        products = [Product(id=i, name=f"sku-{i % 1000}", price=1.0)
+                    for i in range(size)]
+        start = time.perf_counter()
+        catalog = ProductCatalog(products)
+        build = time.perf_counter() - start
+
+        rng = random.Random(size)
+        keys = [rng.randrange(size) for _ in range(lookups)]
+        indexed = _time_per_op(catalog.get, keys)
+
+        if size <= linear_max:
+            linear_keys = keys[: max(1, lookups // 100)]
+            linear = _time_per_op(
+                lambda k: _linear_get(products, k), linear_keys)
+            linear_col = f"{linear * 1e9:13.0f}"
+        else:
+            linear_col = f"{'skipped':>13}"
+        print(f"{size:>10} {build:9.2f} {indexed * 1e9:10.0f} {linear_col}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--linear-max", type=int, default=100_000,
+                        help="Skip the linear-scan baseline above this size.")
+    args = parser.parse_args()
+    run(args.sizes, args.lookups, args.linear_max)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
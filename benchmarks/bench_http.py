@@ -0,0 +1,332 @@
+"""Throughput and latency of ProductService and OrderService endpoints under load.
+
+Each scenario drives one endpoint with a fixed number of concurrent clients
+and reports requests/s and p50/p95/p99 latency. By default the apps run
+in-process behind httpx's ASGI transport, which measures the handlers and the
+framework without sockets. ``--server uvicorn`` starts the services through
+their production entry point (``services/common/serving.py``) instead, adding
+the real HTTP stack and, with ``--workers``, several worker processes.
+Publishing goes to a local stub sidecar, so Dapr is not needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_http
+    python -m benchmarks.bench_http --scenarios get_product --dataset 1000000
+    python -m benchmarks.bench_http --server uvicorn --workers 4
+    python -m benchmarks.bench_http --save-baseline baseline.json
+    python -m benchmarks.bench_http --baseline baseline.json --threshold 0.2
+
+With ``--baseline`` the run exits non-zero when a scenario's throughput
+drops, or its p95/p99 latency grows, by more than ``--threshold``, or when
+it has errors that the baseline did not have.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.stub_sidecar import StubSidecar
+
+# Every request is logged at INFO by the handlers; keep the log pipeline out
+# of the numbers unless asked for.
+DEFAULT_LOG_LEVEL = "WARNING"
+SEED_CONCURRENCY = 64
+STARTUP_TIMEOUT = 30.0
+
+Request = Tuple[str, str, Optional[Any]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    service: str
+    # (request index, dataset size) -> (method, path, JSON body)
+    request: Callable[[int, int], Request]
+
+
+def _spread(i: int, dataset: int) -> int:
+    # Visit ids all over the dataset rather than the same few hot entries.
+    return i * 7919 % dataset + 1
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "get_product": Scenario("product", lambda i, n: (
+        "GET", f"/products/{_spread(i, n)}", None)),
+    "create_product": Scenario("product", lambda i, n: (
+        "POST", "/products", {"id": n + i + 1, "name": f"sku-{i}", "price": 1.0})),
+    "publish_order": Scenario("product", lambda i, n: (
+        "POST", "/publish-order", {"id": i, "product_id": _spread(i, n), "quantity": 1})),
+    "get_order": Scenario("order", lambda i, n: (
+        "GET", f"/orders/{_spread(i, n)}", None)),
+    "create_order": Scenario("order", lambda i, n: (
+        "POST", "/orders", {"id": n + i + 1, "product_id": _spread(i, n), "quantity": 1})),
+    "orders_handler": Scenario("order", lambda i, n: (
+        "POST", "/orders-handler",
+        {"id": f"bench-{i}", "data": {"id": n + i + 1, "product_id": 1, "quantity": 1}})),
+}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, *, requests: int,
+                concurrency: int, dataset: int, first_index: int = 0) -> Dict:
+    """Send ``requests`` requests from ``concurrency`` closed-loop clients."""
+    indexes = iter(range(first_index, first_index + requests))
+    latencies: List[float] = []
+    errors = 0
+
+    async def client_loop() -> None:
+        nonlocal errors
+        for i in indexes:
+            method, path, body = scenario.request(i, dataset)
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body)
+                failed = resp.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _seed_in_memory(module, service: str, dataset: int) -> None:
+    if service == "product":
+        module._catalog = module.ProductCatalog(
+            module.Product(id=i, name=f"sku-{i % 1000}", price=1.0)
+            for i in range(1, dataset + 1))
+    else:
+        module._orders = module.OrderRepository(
+            module.Order(id=i, product_id=i % 1000 + 1, quantity=1)
+            for i in range(1, dataset + 1))
+
+
+@asynccontextmanager
+async def inprocess_client(service: str, sidecar_url: str,
+                           dataset: int) -> AsyncIterator[httpx.AsyncClient]:
+    """The service app, seeded with ``dataset`` entries, behind an ASGI transport."""
+    module = importlib.import_module(f"services.{service}_service.app")
+    _seed_in_memory(module, service, dataset)
+    if service == "product":
+        module.publisher.base_url = sidecar_url
+    app = module.app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://bench") as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _seed_over_http(client: httpx.AsyncClient, service: str, dataset: int) -> None:
+    path = "/products" if service == "product" else "/orders"
+    sem = asyncio.Semaphore(SEED_CONCURRENCY)
+
+    async def create(i: int) -> None:
+        body = ({"id": i, "name": f"sku-{i % 1000}", "price": 1.0} if service == "product"
+                else {"id": i, "product_id": i % 1000 + 1, "quantity": 1})
+        async with sem:
+            resp = await client.post(path, json=body)
+        if resp.status_code not in (201, 400):  # 400: id 1 ships with the app
+            resp.raise_for_status()
+
+    await asyncio.gather(*(create(i) for i in range(1, dataset + 1)))
+
+
+@asynccontextmanager
+async def uvicorn_client(service: str, sidecar_url: str, dataset: int, *,
+                         concurrency: int, workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    """The service under a local uvicorn server, seeded over HTTP."""
+    port = _free_port()
+    env = {**os.environ, "DAPR_BASE_URL": sidecar_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "services.common.serving",
+         f"services.{service}_service.app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        env=env)
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                     limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {process.returncode}")
+                try:
+                    (await client.get("/health")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"{service} service did not start")
+                    await asyncio.sleep(0.1)
+            await _seed_over_http(client, service, dataset)
+            yield client
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run(names: List[str], *, server: str, requests: int, warmup: int,
+              concurrency: int, dataset: int, workers: int = 1) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    with StubSidecar() as sidecar:
+        for service, group in itertools.groupby(names, key=lambda n: SCENARIOS[n].service):
+            if server == "uvicorn":
+                app_client = uvicorn_client(service, sidecar.url, dataset,
+                                            concurrency=concurrency, workers=workers)
+            else:
+                app_client = inprocess_client(service, sidecar.url, dataset)
+            async with app_client as client:
+                for name in group:
+                    scenario = SCENARIOS[name]
+                    # Warm-up indexes come after the measured ones so the
+                    # ids created by both phases never collide.
+                    await drive(client, scenario, requests=warmup,
+                                concurrency=concurrency, dataset=dataset,
+                                first_index=requests)
+                    results[name] = await drive(client, scenario, requests=requests,
+                                                concurrency=concurrency, dataset=dataset)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            threshold: float) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {current['rps']:.0f} req/s "
+                               f"vs baseline {base['rps']:.0f}")
+        for key in ("p95_ms", "p99_ms"):
+            if current[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {current[key]:.2f} "
+                                   f"vs baseline {base[key]:.2f}")
+        if current["errors"] and not base["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors")
+    return regressions
+
+
+def _environment(args) -> Dict[str, Any]:
+    return {
+        "server": args.server,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "dataset": args.dataset,
+        "requests": args.requests,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument("--server", choices=("inprocess", "uvicorn"),
+                        default="inprocess")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes per service with --server uvicorn.")
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Measured requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--dataset", type=int,
+                        help="Products/orders loaded before the run (default: "
+                             "10000, or 1 with --workers above 1).")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="Fail if results regress against this baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative regression (default: 0.2).")
+    parser.add_argument("--log-level", default=DEFAULT_LOG_LEVEL)
+    args = parser.parse_args()
+
+    if args.server == "uvicorn" and importlib.util.find_spec("uvicorn") is None:
+        parser.error("--server uvicorn needs uvicorn installed")
+    if args.workers > 1:
+        if args.server != "uvicorn":
+            parser.error("--workers needs --server uvicorn")
+        # Workers do not share data, so seeding over HTTP would reach only
+        # some of them; look up id 1, which every worker starts with.
+        if args.dataset not in (None, 1):
+            parser.error("--dataset cannot be combined with --workers above 1")
+        args.dataset = 1
+    elif args.dataset is None:
+        args.dataset = 10_000
+    # Read by the services' logging setup, in-process or in the child servers.
+    os.environ["LOG_LEVEL"] = args.log_level
+    # Scenarios of one service share one app instance.
+    names = sorted(args.scenarios, key=lambda n: SCENARIOS[n].service)
+    results = asyncio.run(run(names, server=args.server, requests=args.requests,
+                              warmup=args.warmup, concurrency=args.concurrency,
+                              dataset=args.dataset, workers=args.workers))
+
+    print(f"{'scenario':<16} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['rps']:9.0f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['errors']:7d}")
+
+    environment = _environment(args)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump({"environment": environment, "scenarios": results},
+                      handle, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get("environment") != environment:
+            print("warning: baseline was recorded with different settings: "
+                  f"{baseline.get('environment')}", file=sys.stderr)
+        regressions = compare(results, baseline["scenarios"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regression beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
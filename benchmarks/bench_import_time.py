@@ -0,0 +1,87 @@
+"""Cold-start import budget for the offline Bedrock insights CLI.
+
+Runs the CLI in fresh interpreters under ``python -X importtime`` and sums
+the cumulative import time of every top-level import made after interpreter
+startup (``site`` and ``encodings`` are excluded). Exits non-zero if the
+median run goes over the budget or if boto3/botocore were imported at all.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --budget-ms 150 --runs 7
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+STARTUP_MODULES = {"site", "encodings"}
+FORBIDDEN_PREFIXES = ("boto3", "botocore")
+SCENARIOS = {
+    "offline": ["--offline", "--no-cache", "--context", "benchmark context"],
+    "help": ["--help"],
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Return total top-level import milliseconds and ms per imported module."""
+    total_us = 0
+    modules: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        module = name.strip()
+        modules[module] = int(cumulative_us) / 1000
+        # Top-level imports are not indented past the single separator space.
+        if not name.startswith("  ") and module.split(".")[0] not in STARTUP_MODULES:
+            total_us += int(cumulative_us)
+    return total_us / 1000, modules
+
+
+def measure(args: List[str]) -> Tuple[float, Dict[str, float]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "tools.bedrock_insights.insights",
+         *args],
+        capture_output=True, text=True, check=False,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"CLI failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def run(runs: int, budget_ms: float) -> int:
+    failed = False
+    print(f"{'scenario':<10} {'median ms':>10} {'max ms':>8} {'budget':>8}  result")
+    for scenario, cli_args in SCENARIOS.items():
+        totals: List[float] = []
+        forbidden: List[str] = []
+        for _ in range(runs):
+            total, modules = measure(cli_args)
+            totals.append(total)
+            forbidden = sorted(m for m in modules if m.startswith(FORBIDDEN_PREFIXES))
+        median = statistics.median(totals)
+        ok = median <= budget_ms and not forbidden
+        failed |= not ok
+        print(f"{scenario:<10} {median:10.1f} {max(totals):8.1f} {budget_ms:8.0f}  "
+              f"{'ok' if ok else 'OVER BUDGET'}")
+        if forbidden:
+            print(f"  imported AWS SDK modules: {', '.join(forbidden[:5])}")
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("INSIGHTS_IMPORT_BUDGET_MS", "150")))
+    args = parser.parse_args()
+    return run(args.runs, args.budget_ms)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""Benchmark the shared LogMatcher against the analyzers' old matching loops.
+
+"findall" is the old EnhancedDaprLogAnalyzer loop (one IGNORECASE
+``re.findall`` per pattern over the whole log); "substring" is the old
+DaprLogAnalyzer per-line ``in`` checks. Both are compared with one
+combined-regex scan. A synthetic daprd/app log is generated unless --file
+is given.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_matcher
+    python -m benchmarks.bench_log_matcher --size-mb 1024
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "deployment/current/scripts"))
+
+from log_matcher import LogMatcher  # noqa: E402
+
+PATTERNS = {
+    "scheduler_errors": r"Failed to connect to scheduler host",
+    "component_errors": r"error loading component|component initialization failed",
+    "pubsub_success": r"component loaded successfully.*pubsub",
+    "sidecar_ready": r"dapr initialized|application discovered on port",
+}
+LINES = [
+    (0.90, 'INFO:     10.0.1.7:51234 - "POST /orders-handler HTTP/1.1" 200 OK'),
+    (0.05, 'time="2024-05-01T10:00:00Z" level=info msg="HTTP API Called" app_id=order-service'),
+    (0.02, 'time="2024-05-01T10:00:00Z" level=warning msg="Failed to connect to scheduler host: dial tcp 10.0.0.5:50006"'),
+    (0.01, 'time="2024-05-01T10:00:00Z" level=error msg="error loading component snssqs: access denied"'),
+    (0.01, 'time="2024-05-01T10:00:00Z" level=info msg="component loaded successfully" name=pubsub type=pubsub.aws.snssqs'),
+    (0.01, 'time="2024-05-01T10:00:00Z" level=info msg="dapr initialized. Status: Running"'),
+]
+
+
+def generate(size_bytes: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    weights = [w for w, _ in LINES]
+    texts = [t for _, t in LINES]
+    block = "\n".join(rng.choices(texts, weights, k=10_000)) + "\n"
+    return block * max(1, size_bytes // len(block))
+
+
+def old_findall(logs: str) -> dict:
+    return {name: len(re.findall(pattern, logs, re.IGNORECASE))
+            for name, pattern in PATTERNS.items()}
+
+
+def old_substring(logs: str) -> int:
+    hits = 0
+    for line in logs.split("\n"):
+        if "scheduler host" in line and "Failed to connect" in line:
+            hits += 1
+        if "error" in line.lower() and "component" in line:
+            hits += 1
+        if "dapr initialized" in line:
+            hits += 1
+    return hits
+
+
+def _timed(fn, arg):
+    start = time.perf_counter()
+    result = fn(arg)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--file", help="Benchmark an existing log file instead.")
+    args = parser.parse_args()
+
+    logs = (Path(args.file).read_text(errors="replace") if args.file
+            else generate(args.size_mb * 1024 * 1024))
+    mb = len(logs) / (1024 * 1024)
+    matcher = LogMatcher(PATTERNS)
+
+    expected, findall_s = _timed(old_findall, logs)
+    _, substring_s = _timed(old_substring, logs)
+    counts, matcher_s = _timed(matcher.count, logs)
+    assert {name: counts[name] for name in PATTERNS} == expected, "count mismatch"
+
+    print(f"{mb:.0f} MB, {logs.count(chr(10))} lines")
+    print(f"{'implementation':<26} {'seconds':>8} {'MB/s':>8}")
+    for label, seconds in (("old findall per pattern", findall_s),
+                           ("old per-line substrings", substring_s),
+                           ("LogMatcher single pass", matcher_s)):
+        print(f"{label:<26} {seconds:8.2f} {mb / seconds:8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+"""Benchmark sharded, multi-process archive analysis against one process.
+
+Writes a synthetic daprd/app log (reusing the log matcher benchmark's line
+mix, with timestamps) and analyzes it with 1, 2, 4, ... worker processes up
+to the CPU count. Speedup is relative to the single-process run.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_shards
+    python -m benchmarks.bench_log_shards --size-mb 2048
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "deployment/current/scripts"))
+
+from log_shards import analyze_file_sharded  # noqa: E402
+
+from benchmarks.bench_log_matcher import PATTERNS, generate  # noqa: E402
+
+
+def write_log(path: Path, size_bytes: int) -> None:
+    block = "".join(f"2024-05-01T10:{i % 60:02d}:00.000000000Z {line}\n"
+                    for i, line in enumerate(generate(4 * 1024 * 1024).splitlines()))
+    with open(path, "w") as handle:
+        for _ in range(max(1, size_bytes // len(block))):
+            handle.write(block)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--file", help="Benchmark an existing log file instead.")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.file) if args.file else Path(tmp) / "synthetic.log"
+        if not args.file:
+            write_log(path, args.size_mb * 1024 * 1024)
+        mb = path.stat().st_size / (1024 * 1024)
+        print(f"{mb:.0f} MB, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+        workers, baseline, expected = 1, None, None
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            counts, _ = analyze_file_sharded(path, PATTERNS, workers=workers)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            expected = expected or counts
+            assert counts == expected, "shard results differ"
+            print(f"{workers:>8} {seconds:8.2f} {mb / seconds:8.0f} "
+                  f"{baseline / seconds:8.2f}x")
+            workers *= 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+"""Compare per-request httpx.Client publishing with the pooled DaprPublisher.
+
+Both variants publish to a local stub sidecar so the numbers reflect client
+overhead (connection setup, thread hand-off) rather than SNS latency.
+
+    python -m benchmarks.bench_publish --messages 2000 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.stub_sidecar import StubSidecar
+from services.product_service.publisher import DaprPublisher
+
+# Starlette's default threadpool size, which bounded the old sync handler.
+THREADPOOL_SIZE = 40
+
+
+def _publish_per_request(url: str, payload: dict) -> None:
+    with httpx.Client(timeout=5) as client:
+        client.post(url, json=payload).raise_for_status()
+
+
+def bench_before(base_url: str, messages: int) -> float:
+    url = f"{base_url}/v1.0/publish/pubsub/orders"
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        list(pool.map(lambda i: _publish_per_request(url, {"id": i}),
+                      range(messages)))
+    return messages / (time.perf_counter() - start)
+
+
+async def _bench_after(base_url: str, messages: int, concurrency: int) -> float:
+    publisher = DaprPublisher(base_url, max_connections=concurrency)
+    await publisher.start()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with sem:
+            await publisher.publish("orders", {"id": i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    await publisher.aclose()
+    return messages / elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with StubSidecar() as sidecar:
+        before = bench_before(sidecar.url, args.messages)
+        after = asyncio.run(
+            _bench_after(sidecar.url, args.messages, args.concurrency))
+    print(f"per-request httpx.Client : {before:8.0f} msg/s")
+    print(f"pooled DaprPublisher     : {after:8.0f} msg/s")
+    print(f"speed-up                 : {after / before:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
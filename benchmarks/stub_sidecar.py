@@ -0,0 +1,69 @@
+"""Minimal local stand-in for the Dapr sidecar HTTP API used by benchmarks.
+
+The stub runs an asyncio HTTP/1.1 server in a child process so it does not
+compete with the client under test for the GIL. Every request is answered
+with ``204 No Content``, which is what daprd returns for successful
+``publish`` and ``bulkpublish`` calls.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from typing import Optional
+
+_RESPONSE = b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n"
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(_RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _serve(host: str, port_conn) -> None:
+    async def run() -> None:
+        server = await asyncio.start_server(_handle, host, 0, backlog=1024)
+        port_conn.send(server.sockets[0].getsockname()[1])
+        port_conn.close()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+class StubSidecar:
+    """Context manager that serves the stub on an ephemeral localhost port."""
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        self.host = host
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "StubSidecar":
+        parent, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.host, child), daemon=True)
+        self._process.start()
+        self.port = parent.recv()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
@@ -10,21 +10,22 @@ echo "=== Building and pushing Docker images ==="
 # Login to ECR
 aws ecr get-login-password --profile $AWS_PROFILE --region $REGION | docker login --username AWS --password-stdin $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com
 
+# Images are built from the repository root so they can include services/common
+cd ../..
+
 # Build and push product service
 echo "Building product-service..."
-cd ../../services/product_service
-docker build --platform linux/amd64 -t product-service .
+docker build --platform linux/amd64 -t product-service -f services/product_service/Dockerfile .
 docker tag product-service:latest $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/product-service:latest
 docker push $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/product-service:latest
 
 # Build and push order service
 echo "Building order-service..."
-cd ../order_service
-docker build --platform linux/amd64 -t order-service .
+docker build --platform linux/amd64 -t order-service -f services/order_service/Dockerfile .
 docker tag order-service:latest $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/order-service:latest
 docker push $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/order-service:latest
 
-cd ../../../
+cd deployment/current
 echo "Images pushed successfully!"
 echo "Product Service: $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/product-service:latest"
 echo "Order Service: $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/order-service:latest"
\ No newline at end of file
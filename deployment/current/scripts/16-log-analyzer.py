@@ -1,85 +1,161 @@
 #!/usr/bin/env python3
-import subprocess
-import json
-import re
+import argparse
+import time
 from datetime import datetime
 
+from log_checkpoint import CheckpointStore
+from log_collector import LogCollector, combined_logs
+from log_matcher import LogMatcher
+from log_stream import (add_stream_arguments, lines_from_args, snapshot_lines,
+                        stream_snapshots)
+
 class DaprLogAnalyzer:
-    def __init__(self):
+    def __init__(self, collector=None):
+        self.collector = collector or LogCollector(tail=50)
         self.error_patterns = {
             'scheduler_connection': r'Failed to connect to scheduler host',
-            'component_load_error': r'error loading component',
+            'component_load_error': r'error.*component|component.*error',
             'pubsub_error': r'error publishing message|error subscribing',
-            'sidecar_startup': r'dapr initialized|application discovered',
+            'sidecar_startup': r'dapr initialized',
             'http_errors': r'HTTP/1.1" [45]\d\d'
         }
+        self.matcher = LogMatcher(self.error_patterns)
     
     def get_pod_logs(self, app_name, container='daprd'):
-        """Get logs from Dapr sidecar or application container"""
-        try:
-            cmd = f"kubectl logs -l app={app_name} -c {container} --tail=50"
-            result = subprocess.run(cmd.split(), capture_output=True, text=True)
-            return result.stdout
-        except Exception as e:
-            return f"Error getting logs: {e}"
+        """Get logs from Dapr sidecar or application container of every replica"""
+        collected = self.collector.collect({app_name: [container]})
+        return combined_logs(collected[app_name][container])
     
-    def analyze_logs(self, logs):
-        """Analyze logs and provide insights"""
+    def _apply_rules(self, insights, matched, add_error):
+        """Update insights for one line, given the names of the patterns it matched"""
+        if 'scheduler_connection' in matched:
+            add_error({
+                'type': 'scheduler_connection',
+                'message': 'Scheduler connection failed',
+                'recommendation': 'Disable scheduler in Dapr configuration'
+            })
+            insights['status'] = 'degraded'
+        
+        if 'component_load_error' in matched:
+            add_error({
+                'type': 'component_error',
+                'message': 'Component loading issue',
+                'recommendation': 'Check component configuration'
+            })
+        
+        if 'sidecar_startup' in matched:
+            insights['status'] = 'healthy'
+    
+    def analyze_logs(self, logs, previous=None):
+        """Analyze logs and provide insights
+        
+        With ``previous`` (the insights of earlier runs, from a checkpoint),
+        errors are kept once per type with a running count and the status
+        carries over unless the new lines change it.
+        """
         insights = {
             'errors': [],
             'warnings': [],
             'status': 'healthy',
             'recommendations': []
         }
-        
-        lines = logs.split('\n')
-        for line in lines:
-            if 'scheduler host' in line and 'Failed to connect' in line:
-                insights['errors'].append({
-                    'type': 'scheduler_connection',
-                    'message': 'Scheduler connection failed',
-                    'recommendation': 'Disable scheduler in Dapr configuration'
-                })
-                insights['status'] = 'degraded'
-            
-            if 'error' in line.lower() and 'component' in line:
-                insights['errors'].append({
-                    'type': 'component_error',
-                    'message': 'Component loading issue',
-                    'recommendation': 'Check component configuration'
-                })
+        add_error = insights['errors'].append
+        if previous is not None:
+            insights['status'] = previous.get('status', 'healthy')
+            errors = {e['type']: dict(e) for e in previous.get('errors', [])}
             
-            if 'dapr initialized' in line:
-                insights['status'] = 'healthy'
+            def add_error(error):
+                errors.setdefault(error['type'], {**error, 'count': 0})['count'] += 1
+        
+        # Only lines hit by the combined pattern are looked at individually
+        for _, matched in self.matcher.iter_matches(logs):
+            self._apply_rules(insights, matched, add_error)
         
+        if previous is not None:
+            insights['errors'] = list(errors.values())
         return insights
     
-    def generate_report(self):
-        """Generate comprehensive log analysis report"""
+    def watch_logs(self, lines, interval=10.0):
+        """Analyze a line stream incrementally, yielding insight snapshots.
+        
+        Errors are kept once per type with an occurrence count, so memory
+        stays constant however long the stream runs.
+        """
+        insights = {'errors': [], 'warnings': [], 'status': 'healthy',
+                    'recommendations': []}
+        errors = {}
+        
+        def add_error(error):
+            errors.setdefault(error['type'], {**error, 'count': 0})['count'] += 1
+        
+        def update(line):
+            matched = self.matcher.line_counts(line)
+            if matched:
+                self._apply_rules(insights, matched, add_error)
+        
+        def snapshot():
+            return {**insights, 'errors': [dict(e) for e in errors.values()]}
+        
+        return stream_snapshots(lines, update, snapshot, interval=interval)
+    
+    def generate_report(self, checkpoint=None):
+        """Generate comprehensive log analysis report
+        
+        With a checkpoint only the lines logged since the last run are
+        fetched and analyzed, and merged into the insights saved there.
+        """
         services = ['product-service', 'order-service']
         report = {
             'timestamp': datetime.now().isoformat(),
             'services': {}
         }
         
+        if checkpoint:
+            # Resuming needs a timestamp on every line, untimed access logs too;
+            # otherwise they never move the checkpoint and get counted again.
+            self.collector.timestamps = True
+        
+        # Fetch all pods of all services at once; analysis runs afterwards
+        started = time.monotonic()
+        collected = self.collector.collect(
+            {s: ['daprd', s] for s in services},
+            since=checkpoint.since_times() if checkpoint else None)
+        report['collection_seconds'] = round(time.monotonic() - started, 3)
+        
         for service in services:
             print(f"Analyzing {service}...")
             
             # Analyze Dapr sidecar logs
-            dapr_logs = self.get_pod_logs(service, 'daprd')
-            dapr_analysis = self.analyze_logs(dapr_logs)
+            dapr_analysis = self._analyze_entries(
+                collected[service]['daprd'], f"{service}-dapr", checkpoint)
             
             # Analyze application logs
-            app_logs = self.get_pod_logs(service, service)
-            app_analysis = self.analyze_logs(app_logs)
+            app_analysis = self._analyze_entries(
+                collected[service][service], f"{service}-app", checkpoint)
             
             report['services'][service] = {
+                'pods': len({e.pod for e in collected[service]['daprd'] if e.pod}),
                 'dapr': dapr_analysis,
                 'application': app_analysis
             }
         
+        if checkpoint:
+            report['new_lines'] = checkpoint.new_lines
+            checkpoint.prune_pods(
+                (e.pod, e.container) for containers in collected.values()
+                for entries in containers.values() for e in entries if e.pod)
+            checkpoint.save()
+        
         return report
     
+    def _analyze_entries(self, entries, key, checkpoint):
+        if checkpoint is None:
+            return self.analyze_logs(combined_logs(entries))
+        analysis = self.analyze_logs(checkpoint.new_logs(entries),
+                                     previous=checkpoint.totals(key, {}))
+        checkpoint.set_totals(key, analysis)
+        return analysis
+    
     def print_insights(self, report):
         """Print human-readable insights"""
         print("\n=== DAPR LOG ANALYSIS REPORT ===")
@@ -103,6 +179,21 @@ class DaprLogAnalyzer:
             print(f"  App Status: {app_status}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze Dapr sidecar and app logs.")
+    add_stream_arguments(parser)
+    parser.add_argument("--state", metavar="PATH",
+                        help="Checkpoint file: analyze only lines new since the last "
+                        "run and keep running totals there.")
+    args = parser.parse_args()
+    
     analyzer = DaprLogAnalyzer()
-    report = analyzer.generate_report()
-    analyzer.print_insights(report)
\ No newline at end of file
+    if args.file or args.follow:
+        # Long-running watcher: one JSON snapshot per interval on stdout
+        snapshots = analyzer.watch_logs(lines_from_args(args, analyzer.collector),
+                                        interval=args.interval)
+        for line in snapshot_lines(snapshots):
+            print(line, flush=True)
+    else:
+        report = analyzer.generate_report(
+            CheckpointStore(args.state) if args.state else None)
+        analyzer.print_insights(report)
@@ -1,12 +1,24 @@
 #!/usr/bin/env python3
-import subprocess
+import argparse
 import json
-import re
+import os
 from datetime import datetime
-from collections import defaultdict
+import time
+from collections import Counter, defaultdict
+
+from log_checkpoint import CheckpointStore
+from log_collector import LogCollector, combined_logs
+from log_matcher import LogMatcher
+from log_shards import analyze_file_sharded
+from log_stream import (add_stream_arguments, lines_from_args, snapshot_lines,
+                        source_name, stream_snapshots)
+from log_windows import WindowedAggregator, parse_timestamp
 
 class EnhancedDaprLogAnalyzer:
-    def __init__(self):
+    def __init__(self, collector=None, windows=None):
+        # --timestamps so every line, even untimed access logs, can be windowed
+        self.collector = collector or LogCollector(tail=100, timestamps=True)
+        self.windows = windows or WindowedAggregator()
         self.insights = {
             'scheduler_errors': {
                 'pattern': r'Failed to connect to scheduler host',
@@ -33,38 +45,51 @@ class EnhancedDaprLogAnalyzer:
                 'impact': 'Positive - Dapr sidecar is healthy'
             }
         }
+        self.matcher = LogMatcher(
+            {name: config['pattern'] for name, config in self.insights.items()})
     
     def get_pod_logs(self, app_name, container='daprd', lines=100):
-        try:
-            cmd = f"kubectl logs -l app={app_name} -c {container} --tail={lines}"
-            result = subprocess.run(cmd.split(), capture_output=True, text=True)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
+        collected = self.collector.collect({app_name: [container]}, tail=lines)
+        return combined_logs(collected[app_name][container])
+    
+    def _score_delta(self, pattern_name):
+        """Health score change for a pattern that occurred at least once"""
+        severity = self.insights[pattern_name]['severity']
+        if severity == 'high':
+            return -30
+        if severity == 'warning':
+            return -5
+        if severity == 'info' and 'success' in pattern_name:
+            return 10
+        return 0
     
-    def analyze_logs_advanced(self, logs, service_name):
+    def analysis_from_counts(self, counts, service_name):
+        """Build the analysis dict from per-pattern occurrence counts.
+        
+        When the service's lines carry timestamps, a pattern only costs health
+        score if it occurred within the recent windows; an error burst from an
+        hour ago is still listed under issues but no longer scored.
+        """
         analysis = {
             'service': service_name,
             'status': 'unknown',
             'issues': defaultdict(int),
+            'recent_issues': {},
+            'anomalies': [],
             'recommendations': [],
             'health_score': 100
         }
+        recent = self.windows.recent(service_name) or {}
         
-        lines = logs.split('\n')
-        total_lines = len([l for l in lines if l.strip()])
-        
-        for pattern_name, config in self.insights.items():
-            matches = len(re.findall(config['pattern'], logs, re.IGNORECASE))
+        for pattern_name in self.insights:
+            matches = counts[pattern_name]
             if matches > 0:
                 analysis['issues'][pattern_name] = matches
-                
-                if config['severity'] == 'high':
-                    analysis['health_score'] -= 30
-                elif config['severity'] == 'warning':
-                    analysis['health_score'] -= 5
-                elif config['severity'] == 'info' and 'success' in pattern_name:
-                    analysis['health_score'] += 10
+                if recent.get(pattern_name) != 0:
+                    analysis['health_score'] += self._score_delta(pattern_name)
+        analysis['recent_issues'] = {k: v for k, v in recent.items() if v}
+        analysis['anomalies'] = [spike for spike in self.windows.spikes()
+                                 if spike['service'] == service_name]
         
         # Determine overall status
         if analysis['health_score'] >= 80:
@@ -73,6 +98,10 @@ class EnhancedDaprLogAnalyzer:
             analysis['status'] = 'degraded'
         else:
             analysis['status'] = 'unhealthy'
+        if analysis['status'] == 'healthy' and any(
+                self.insights[a['pattern']]['severity'] in ['high', 'warning']
+                for a in analysis['anomalies']):
+            analysis['status'] = 'degraded'
         
         # Generate recommendations
         for issue, count in analysis['issues'].items():
@@ -86,7 +115,90 @@ class EnhancedDaprLogAnalyzer:
         
         return analysis
     
-    def generate_enhanced_report(self):
+    def _record(self, service_name, line, matched, last_timestamp):
+        """Feed one matched line into the time windows; returns its timestamp"""
+        timestamp = parse_timestamp(line) or last_timestamp
+        if timestamp is not None:
+            for name, n in matched.items():
+                self.windows.add(service_name, name, timestamp, n)
+        return timestamp
+    
+    def analyze_logs_advanced(self, logs, service_name, checkpoint=None):
+        counts = Counter()
+        last_timestamp = None
+        for line, matched in self.matcher.iter_matches(logs):
+            counts.update(matched)
+            # Lines without a timestamp (tracebacks...) belong to the previous one
+            last_timestamp = self._record(service_name, line, matched, last_timestamp)
+        if checkpoint:
+            counts = Counter(checkpoint.add_counts(service_name, counts))
+        return self.analysis_from_counts(counts, service_name)
+    
+    def analyze_file(self, path, service_name=None, workers=None, checkpoint=None):
+        """Analyze a (multi-GB) archived log file across a process pool.
+        
+        With a checkpoint only the bytes appended since the last run are
+        read, and the counts are added to the saved running totals.
+        """
+        service_name = service_name or os.path.basename(path)
+        start, end = checkpoint.file_range(path) if checkpoint else (0, None)
+        counts, windowed = analyze_file_sharded(
+            path, {name: config['pattern'] for name, config in self.insights.items()},
+            workers=workers, window_seconds=self.windows.window, start=start, end=end)
+        for (name, window_id), n in sorted(windowed.items(), key=lambda kv: kv[0][1]):
+            self.windows.add(service_name, name, window_id * self.windows.window, n)
+        if checkpoint:
+            checkpoint.set_file_offset(path, end)
+            counts = Counter(checkpoint.add_counts(service_name, counts))
+        return self.analysis_from_counts(counts, service_name)
+    
+    def generate_archive_report(self, paths, workers=None, checkpoint=None):
+        """Report over archived log files; counts and recommendations are merged"""
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'files': {},
+            'summary': {'total_issues': 0, 'issues': Counter(), 'recommendations': []}
+        }
+        started = time.monotonic()
+        for path in paths:
+            analysis = self.analyze_file(path, workers=workers, checkpoint=checkpoint)
+            report['files'][path] = analysis
+            report['summary']['issues'].update(analysis['issues'])
+        report['summary']['total_issues'] = len(report['summary']['issues'])
+        for issue, count in report['summary']['issues'].items():
+            if self.insights[issue]['severity'] in ['high', 'warning']:
+                report['summary']['recommendations'].append({
+                    'issue': issue,
+                    'count': count,
+                    'solution': self.insights[issue]['solution'],
+                    'impact': self.insights[issue]['impact']
+                })
+        report['summary']['analysis_seconds'] = round(time.monotonic() - started, 3)
+        return report
+    
+    def watch_logs(self, lines, service_name, interval=10.0):
+        """Analyze a line stream incrementally, yielding analysis snapshots.
+        
+        Only per-pattern counts and fixed-size time windows are kept, so
+        memory stays constant however long the stream runs.
+        """
+        counts = Counter()
+        state = {'last_timestamp': None}
+        
+        def update(line):
+            matched = self.matcher.line_counts(line)
+            if matched:
+                counts.update(matched)
+                state['last_timestamp'] = self._record(
+                    service_name, line, matched, state['last_timestamp'])
+        
+        def snapshot():
+            return self.analysis_from_counts(counts, service_name)
+        
+        return stream_snapshots(lines, update, snapshot, interval=interval)
+    
+    def generate_enhanced_report(self, checkpoint=None):
+        """Analyze the pods' logs; with a checkpoint, only lines new since the last run"""
         services = ['product-service', 'order-service']
         report = {
             'timestamp': datetime.now().isoformat(),
@@ -96,19 +208,41 @@ class EnhancedDaprLogAnalyzer:
                 'total_issues': 0,
                 'critical_issues': 0,
                 'recommendations': []
-            }
+            },
+            'anomalies': []
         }
+        # Each report scores only the tail it fetched, unless resuming from a checkpoint
+        self.windows.clear()
+        if checkpoint:
+            self.windows.load(checkpoint.totals('windows'))
+        
+        if checkpoint:
+            # Resuming needs a timestamp on every line, untimed access logs too;
+            # otherwise they never move the checkpoint and get counted again.
+            self.collector.timestamps = True
+        
+        # Fetch all pods of all services at once; analysis runs afterwards
+        started = time.monotonic()
+        collected = self.collector.collect(
+            {s: ['daprd', s] for s in services},
+            since=checkpoint.since_times() if checkpoint else None)
+        report['summary']['collection_seconds'] = round(time.monotonic() - started, 3)
         
         for service in services:
             print(f"🔍 Analyzing {service}...")
             
-            dapr_logs = self.get_pod_logs(service, 'daprd')
-            app_logs = self.get_pod_logs(service, service)
+            if checkpoint:
+                dapr_logs = checkpoint.new_logs(collected[service]['daprd'])
+                app_logs = checkpoint.new_logs(collected[service][service])
+            else:
+                dapr_logs = combined_logs(collected[service]['daprd'])
+                app_logs = combined_logs(collected[service][service])
             
-            dapr_analysis = self.analyze_logs_advanced(dapr_logs, f"{service}-dapr")
-            app_analysis = self.analyze_logs_advanced(app_logs, f"{service}-app")
+            dapr_analysis = self.analyze_logs_advanced(dapr_logs, f"{service}-dapr", checkpoint)
+            app_analysis = self.analyze_logs_advanced(app_logs, f"{service}-app", checkpoint)
             
             report['services'][service] = {
+                'pods': len({e.pod for e in collected[service]['daprd'] if e.pod}),
                 'dapr': dapr_analysis,
                 'application': app_analysis
             }
@@ -116,6 +250,7 @@ class EnhancedDaprLogAnalyzer:
             # Update summary
             report['summary']['total_issues'] += len(dapr_analysis['issues']) + len(app_analysis['issues'])
             report['summary']['recommendations'].extend(dapr_analysis['recommendations'])
+            report['anomalies'].extend(dapr_analysis['anomalies'] + app_analysis['anomalies'])
         
         # Determine cluster health
         avg_health = sum([
@@ -130,6 +265,14 @@ class EnhancedDaprLogAnalyzer:
         else:
             report['cluster_health'] = 'unhealthy'
         
+        if checkpoint:
+            report['summary']['new_lines'] = checkpoint.new_lines
+            checkpoint.prune_pods(
+                (e.pod, e.container) for containers in collected.values()
+                for entries in containers.values() for e in entries if e.pod)
+            checkpoint.set_totals('windows', self.windows.to_dict())
+            checkpoint.save()
+        
         return report
     
     def print_enhanced_insights(self, report):
@@ -157,6 +300,13 @@ class EnhancedDaprLogAnalyzer:
             app = data['application']
             print(f"  🚀 Application: {app['status']} (Health: {app['health_score']}/100)")
         
+        # Rate spikes in the latest window
+        if report.get('anomalies'):
+            print(f"\n⚡ ANOMALIES (latest {report['anomalies'][0]['window_seconds']:g}s window):")
+            for spike in report['anomalies']:
+                print(f"  - {spike['service']}: {spike['pattern']} x{spike['count']} "
+                      f"(baseline {spike['baseline_per_window']}/window)")
+        
         # Recommendations
         if report['summary']['recommendations']:
             print(f"\n💡 RECOMMENDATIONS:")
@@ -167,6 +317,36 @@ class EnhancedDaprLogAnalyzer:
         print(f"\n✅ Analysis complete. Run 'kubectl get pods' to check current status.")
 
 if __name__ == "__main__":
-    analyzer = EnhancedDaprLogAnalyzer()
-    report = analyzer.generate_enhanced_report()
-    analyzer.print_enhanced_insights(report)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="AI-powered Dapr log analysis.")
+    add_stream_arguments(parser)
+    parser.add_argument("--window", type=float, default=60.0,
+                        help="Seconds per aggregation window (default: 60).")
+    parser.add_argument("--spike-factor", type=float, default=3.0,
+                        help="Flag a window with this many times its baseline rate (default: 3).")
+    parser.add_argument("--archive", nargs="+", metavar="PATH",
+                        help="Analyze large archived log files in parallel shards.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --archive (default: CPU count).")
+    parser.add_argument("--state", metavar="PATH",
+                        help="Checkpoint file: analyze only lines new since the last "
+                        "run and keep running totals there.")
+    args = parser.parse_args()
+    
+    analyzer = EnhancedDaprLogAnalyzer(windows=WindowedAggregator(
+        window_seconds=args.window, spike_factor=args.spike_factor))
+    checkpoint = CheckpointStore(args.state) if args.state else None
+    if args.archive:
+        report = analyzer.generate_archive_report(args.archive, workers=args.workers,
+                                                  checkpoint=checkpoint)
+        if checkpoint:
+            checkpoint.save()
+        print(json.dumps(report, indent=2, default=list))
+    elif args.file or args.follow:
+        # Long-running watcher: one JSON snapshot per interval on stdout
+        snapshots = analyzer.watch_logs(lines_from_args(args, analyzer.collector),
+                                        source_name(args), interval=args.interval)
+        for line in snapshot_lines(snapshots):
+            print(line, flush=True)
+    else:
+        report = analyzer.generate_enhanced_report(checkpoint)
+        analyzer.print_enhanced_insights(report)
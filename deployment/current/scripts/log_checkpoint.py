@@ -0,0 +1,133 @@
+"""Checkpoints for incremental (cron-style) log analysis.
+
+A small JSON state file remembers, per pod container, the timestamp of the
+last line analyzed (fetched again with ``kubectl logs --since-time``) and, per
+archived file, the byte offset analyzed up to. It also keeps the analyzers'
+running totals, so each run only scans new lines and merges them in: the cost
+of a run follows the volume of new logs, not the size of the tail.
+"""
+import json
+import os
+import tempfile
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from log_collector import combined_logs
+from log_windows import parse_timestamp
+
+DEFAULT_STATE_FILE = os.getenv("LOG_ANALYZER_STATE_FILE", ".log-analyzer-state.json")
+
+
+def _pod_key(pod, container) -> str:
+    return f"{pod}/{container}"
+
+
+class CheckpointStore:
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        try:
+            with open(path) as handle:
+                self.state = json.load(handle)
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault("pods", {})
+        self.state.setdefault("files", {})
+        self.state.setdefault("totals", {})
+        self.new_lines = 0
+
+    # -- pods ---------------------------------------------------------------
+
+    def since_times(self) -> Dict[Tuple[str, str], str]:
+        """``(pod, container) -> RFC 3339 time`` to resume each pod from."""
+        since = {}
+        for key, checkpoint in self.state["pods"].items():
+            pod, _, container = key.rpartition("/")
+            since[(pod, container)] = datetime.fromtimestamp(
+                int(checkpoint["last_timestamp"]), timezone.utc
+            ).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return since
+
+    def new_pod_logs(self, entry) -> str:
+        """The lines of ``entry`` (a ``PodLogs``) not analyzed by an earlier run.
+
+        ``--since-time`` has one-second resolution, so lines at or before the
+        saved timestamp are dropped here; the checkpoint then moves to the
+        newest line returned.
+        """
+        key = _pod_key(entry.pod, entry.container)
+        checkpoint = self.state["pods"].get(key, {})
+        last = checkpoint.get("last_timestamp")
+        newest = last
+        kept = []
+        for line in entry.logs.splitlines(keepends=True):
+            timestamp = parse_timestamp(line)
+            if timestamp is not None:
+                if last is not None and timestamp <= last:
+                    continue
+                newest = timestamp if newest is None else max(newest, timestamp)
+            kept.append(line)
+        if newest is not None and entry.pod:
+            self.state["pods"][key] = {"last_timestamp": newest}
+        self.new_lines += len(kept)
+        return "".join(kept)
+
+    def new_logs(self, entries) -> str:
+        """``combined_logs`` of only the new lines of several ``PodLogs``."""
+        return combined_logs([replace(entry, logs=self.new_pod_logs(entry))
+                              for entry in entries])
+
+    def prune_pods(self, active: Iterable[Tuple[str, str]]) -> None:
+        """Forget pods that no longer exist, so the state file stays small."""
+        keep = {_pod_key(pod, container) for pod, container in active}
+        self.state["pods"] = {k: v for k, v in self.state["pods"].items() if k in keep}
+
+    # -- files --------------------------------------------------------------
+
+    def file_range(self, path) -> Tuple[int, int]:
+        """Byte range of ``path`` still to analyze, ending on a complete line.
+
+        Starts over when the file was rotated (new inode) or truncated.
+        """
+        stat = os.stat(path)
+        checkpoint = self.state["files"].get(os.path.abspath(path), {})
+        start = checkpoint.get("offset", 0)
+        if checkpoint.get("inode") != stat.st_ino or start > stat.st_size:
+            start = 0
+        end = stat.st_size
+        if end > start:
+            with open(path, "rb") as handle:
+                # Leave a trailing partial line for the next run.
+                handle.seek(max(start, end - 65536))
+                tail = handle.read(end - handle.tell())
+                newline = tail.rfind(b"\n")
+                end = end - len(tail) + newline + 1 if newline != -1 else start
+        return start, end
+
+    def set_file_offset(self, path, offset: int) -> None:
+        self.state["files"][os.path.abspath(path)] = {
+            "offset": offset, "inode": os.stat(path).st_ino}
+
+    # -- running totals -----------------------------------------------------
+
+    def totals(self, key: str, default: Optional[Any] = None) -> Any:
+        return self.state["totals"].get(key, default)
+
+    def set_totals(self, key: str, value: Any) -> None:
+        self.state["totals"][key] = value
+
+    def add_counts(self, key: str, counts: Mapping[str, int]) -> Dict[str, int]:
+        """Merge ``counts`` into the running totals for ``key`` and return them."""
+        totals = self.state["totals"].setdefault(key, {})
+        for name, n in counts.items():
+            totals[name] = totals.get(name, 0) + n
+        return totals
+
+    def save(self) -> None:
+        """Write the state atomically, so an interrupted run keeps the old one."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(self.state, handle, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
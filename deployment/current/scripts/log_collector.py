@@ -0,0 +1,134 @@
+"""Concurrent per-pod log collection shared by the Dapr log analyzers.
+
+``kubectl logs -l app=...`` fetches replicas one selector at a time and is
+capped by ``--max-log-requests``, so on a large deployment it silently drops
+pods. Instead, pods are listed once per app and every pod/container log is
+fetched with its own ``kubectl logs`` process on a bounded thread pool, each
+with its own timeout. Collection time follows the slowest pod rather than the
+sum of all of them.
+"""
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_MAX_WORKERS = int(os.getenv("LOG_ANALYZER_MAX_WORKERS", "16"))
+DEFAULT_POD_TIMEOUT = float(os.getenv("LOG_ANALYZER_POD_TIMEOUT", "20"))
+
+
+@dataclass
+class PodLogs:
+    """Logs (or the reason there are none) for one pod container."""
+
+    app: str
+    pod: str
+    container: str
+    logs: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+class LogCollector:
+    def __init__(self, *, namespace=None, tail=50, max_workers=DEFAULT_MAX_WORKERS,
+                 timeout=DEFAULT_POD_TIMEOUT, kubectl="kubectl", timestamps=False):
+        self.namespace = namespace
+        self.timestamps = timestamps
+        self.tail = tail
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.kubectl = kubectl
+
+    def command(self, *args):
+        """``kubectl`` argv for ``args``, scoped to the namespace if one is set."""
+        cmd = [self.kubectl, *args]
+        if self.namespace:
+            cmd += ["-n", self.namespace]
+        return cmd
+
+    def list_pods(self, app_name) -> List[Tuple[str, List[str]]]:
+        """Return ``(pod, [container, ...])`` for every pod labelled ``app=<app_name>``."""
+        result = subprocess.run(
+            self.command("get", "pods", "-l", f"app={app_name}", "-o", "json"),
+            capture_output=True, text=True, timeout=self.timeout, check=True)
+        pods = []
+        for item in json.loads(result.stdout or "{}").get("items", []):
+            containers = [c["name"] for c in item.get("spec", {}).get("containers", [])]
+            pods.append((item["metadata"]["name"], containers))
+        return pods
+
+    def fetch(self, app_name, pod, container, tail=None, since_time=None) -> PodLogs:
+        """Logs of one pod container: the last ``tail`` lines, or all since ``since_time``.
+
+        ``since_time`` (RFC 3339) implies ``--timestamps`` so callers can
+        tell which returned lines they have already seen.
+        """
+        started = time.monotonic()
+        entry = PodLogs(app_name, pod, container)
+        tail = self.tail if tail is None else tail
+        args = ["logs", pod, "-c", container]
+        args.append(f"--since-time={since_time}" if since_time else f"--tail={tail}")
+        if self.timestamps or since_time:
+            args.append("--timestamps")
+        try:
+            result = subprocess.run(
+                self.command(*args),
+                capture_output=True, text=True, timeout=self.timeout)
+            entry.logs = result.stdout
+            if result.returncode != 0:
+                entry.error = result.stderr.strip() or f"kubectl exited {result.returncode}"
+        except subprocess.TimeoutExpired:
+            entry.error = f"timed out after {self.timeout:g}s"
+        except OSError as e:
+            entry.error = str(e)
+        entry.seconds = time.monotonic() - started
+        return entry
+
+    def collect(self, containers_by_app: Dict[str, Sequence[str]], tail=None,
+                since: Optional[Mapping[Tuple[str, str], str]] = None
+                ) -> Dict[str, Dict[str, List[PodLogs]]]:
+        """Fetch every requested container of every pod of each app concurrently.
+
+        Returns ``{app: {container: [PodLogs, ...]}}``. Pods that do not run a
+        requested container are skipped; listing or fetch failures are recorded
+        on the ``PodLogs`` entries instead of raised. ``since`` maps
+        ``(pod, container)`` to the time to resume from (see :meth:`fetch`).
+        """
+        since = {} if since is None else since
+        report = {app: {c: [] for c in containers}
+                  for app, containers in containers_by_app.items()}
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="pod-logs") as pool:
+            listings = {app: pool.submit(self.list_pods, app) for app in containers_by_app}
+            fetches = []
+            for app, listing in listings.items():
+                try:
+                    pods = listing.result()
+                except (subprocess.SubprocessError, OSError, ValueError) as e:
+                    for container in containers_by_app[app]:
+                        report[app][container].append(
+                            PodLogs(app, "", container, error=f"listing pods failed: {e}"))
+                    continue
+                for pod, pod_containers in pods:
+                    for container in containers_by_app[app]:
+                        if container in pod_containers:
+                            fetches.append(pool.submit(
+                                self.fetch, app, pod, container, tail,
+                                since.get((pod, container))))
+            for future in fetches:
+                entry = future.result()
+                report[entry.app][entry.container].append(entry)
+        return report
+
+
+def combined_logs(entries: Sequence[PodLogs]) -> str:
+    """Join the logs of several pods, with failed fetches noted inline."""
+    parts = []
+    for entry in entries:
+        if entry.error:
+            parts.append(f"Error getting logs from {entry.pod or entry.app}: {entry.error}\n")
+        parts.append(entry.logs)
+    return "".join(part if part.endswith("\n") or not part else part + "\n"
+                   for part in parts)
@@ -0,0 +1,158 @@
+"""Single-pass multi-pattern matching shared by the Dapr log analyzers.
+
+Every pattern is compiled once, together with one case-insensitive
+alternation of all of them. Scanning a log works in two steps:
+
+1. Literal prefilter: each pattern's required leading literal (one per
+   alternation branch, e.g. ``dapr initialized``) is searched for in a
+   lowercased copy of the text with ``str.find``, which runs at memory speed.
+   If some pattern has no usable literal, the combined regex is used instead.
+2. Only the lines found in step 1 are matched against the individual
+   patterns, to tell which of them matched and how often.
+
+Counts equal ``len(re.findall(pattern, text, re.IGNORECASE))`` per pattern as
+long as no pattern spans a newline.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+MIN_LITERAL = 3
+BLOCK_CHARS = 8 * 1024 * 1024
+
+
+def required_literals(pattern: str, flags=0) -> Optional[List[str]]:
+    """Lowercased literals one of which every match of ``pattern`` starts with.
+
+    Returns ``None`` if some alternation branch does not start with a literal
+    of at least ``MIN_LITERAL`` characters (``\\d+ errors``, ``(a|b)c``...).
+    """
+    parsed = _sre_parse.parse(pattern, flags)
+    items = list(parsed)
+    if len(items) == 1 and items[0][0] is _sre_parse.BRANCH:
+        branches = items[0][1][1]
+    else:
+        branches = [items]
+    literals = []
+    for branch in branches:
+        chars = []
+        for op, av in branch:
+            if op is not _sre_parse.LITERAL:
+                break
+            chars.append(chr(av))
+        if len(chars) < MIN_LITERAL:
+            return None
+        literals.append("".join(chars).lower())
+    return literals
+
+
+class LogMatcher:
+    def __init__(self, patterns: Mapping[str, str], flags=re.IGNORECASE):
+        self.names = list(patterns)
+        self._patterns = [(name, re.compile(pattern, flags))
+                          for name, pattern in patterns.items()]
+        self._any = re.compile("|".join(f"(?:{p})" for p in patterns.values()), flags)
+        # literal -> indexes of the patterns it can start a match of
+        literals: Optional[Dict[str, List[int]]] = {}
+        for index, pattern in enumerate(patterns.values()):
+            found = required_literals(pattern, flags)
+            if found is None:
+                literals = None
+                break
+            for literal in found:
+                literals.setdefault(literal, []).append(index)
+        # Lowercasing is only a valid prefilter when matching ignores case.
+        self._literals = literals if literals and flags & re.IGNORECASE else None
+
+    def line_counts(self, line: str) -> Dict[str, int]:
+        """Occurrences of each matching pattern in one line (non-matches omitted)."""
+        if self._literals is not None and line.isascii():
+            lowered = line.lower()
+            indexes = {i for literal, found in self._literals.items()
+                       if literal in lowered for i in found}
+            if not indexes:
+                return {}
+            return self._counts(line, [self._patterns[i] for i in sorted(indexes)])
+        if not self._any.search(line):
+            return {}
+        return self._counts(line, self._patterns)
+
+    @staticmethod
+    def _counts(line, patterns) -> Dict[str, int]:
+        counts = {}
+        for name, pattern in patterns:
+            n = len(pattern.findall(line))
+            if n:
+                counts[name] = n
+        return counts
+
+    def classify(self, line: str) -> List[str]:
+        """Names of the patterns found in ``line``, in declaration order."""
+        return list(self.line_counts(line))
+
+    def _candidate_lines(self, text: str) -> Iterator[Tuple[int, int, list]]:
+        """``(start, end, patterns)`` of each line that may match, in order."""
+        if self._literals is None or not text.isascii():
+            # No literal prefilter (non-ASCII text can change length when
+            # lowercased); let the combined regex find the lines.
+            pos = 0
+            while True:
+                m = self._any.search(text, pos)
+                if m is None:
+                    return
+                start = text.rfind("\n", 0, m.start()) + 1
+                end = text.find("\n", m.start())
+                end = len(text) if end == -1 else end
+                yield start, end, self._patterns
+                pos = end + 1
+        block_start = 0
+        while block_start < len(text):
+            # Blocks end on a newline so lines never straddle two blocks.
+            block_end = text.find("\n", block_start + BLOCK_CHARS)
+            block_end = len(text) if block_end == -1 else block_end + 1
+            lowered = text[block_start:block_end].lower()
+            hits: Dict[int, set] = {}
+            for literal, indexes in self._literals.items():
+                i = lowered.find(literal)
+                while i != -1:
+                    hits.setdefault(lowered.rfind("\n", 0, i) + 1, set()).update(indexes)
+                    next_line = lowered.find("\n", i)
+                    if next_line == -1:
+                        break
+                    i = lowered.find(literal, next_line + 1)
+            for start in sorted(hits):
+                end = lowered.find("\n", start)
+                end = len(lowered) if end == -1 else end
+                # Only the patterns whose literal occurred in this line can match.
+                yield (block_start + start, block_start + end,
+                       [self._patterns[i] for i in sorted(hits[start])])
+            block_start = block_end
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """Yield ``(line, counts)`` for each line of ``text`` that matches anything."""
+        for start, end, patterns in self._candidate_lines(text):
+            line = text[start:end]
+            counts = self._counts(line, patterns)
+            if counts:
+                yield line, counts
+
+    def count(self, text: str) -> Counter:
+        """Total occurrences of every pattern in ``text``."""
+        totals = Counter()
+        for _, counts in self.iter_matches(text):
+            totals.update(counts)
+        return totals
+
+    def count_lines(self, lines: Iterable[str]) -> Counter:
+        """Like :meth:`count` for an iterable of lines (e.g. a file or stream)."""
+        totals = Counter()
+        for line in lines:
+            counts = self.line_counts(line)
+            if counts:
+                totals.update(counts)
+        return totals
@@ -0,0 +1,104 @@
+"""Parallel analysis of large archived log files.
+
+A file is memory-mapped and cut into line-aligned byte ranges (shards). Each
+shard is scanned by a worker process with its own :class:`LogMatcher`, a
+block at a time so a worker never holds more than ``BLOCK_BYTES`` of decoded
+text, and the per-pattern counts (plus per-window counts for the time
+windows) are merged in the parent. Only byte offsets and small count dicts
+cross process boundaries.
+"""
+import mmap
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from log_matcher import LogMatcher
+from log_windows import parse_timestamp
+
+BLOCK_BYTES = 32 * 1024 * 1024
+SHARDS_PER_WORKER = 4
+
+_matchers: Dict[Tuple[Tuple[str, str], ...], LogMatcher] = {}
+
+
+def shard_offsets(path, shards: int, start: int = 0,
+                  end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Split ``path[start:end]`` into at most ``shards`` ranges ending on a newline."""
+    end = os.path.getsize(path) if end is None else end
+    size = end - start
+    if size <= 0:
+        return []
+    with open(path, "rb") as handle, \
+            mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [start]
+        for k in range(1, shards):
+            cut = mm.find(b"\n", max(bounds[-1], start + size * k // shards), end)
+            if cut == -1:
+                break
+            if cut + 1 > bounds[-1] and cut + 1 < end:
+                bounds.append(cut + 1)
+        bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _matcher(patterns: Tuple[Tuple[str, str], ...]) -> LogMatcher:
+    # Compiled once per worker process, not once per shard.
+    matcher = _matchers.get(patterns)
+    if matcher is None:
+        matcher = _matchers[patterns] = LogMatcher(dict(patterns))
+    return matcher
+
+
+def analyze_shard(path, start: int, end: int, patterns: Tuple[Tuple[str, str], ...],
+                  window_seconds: float) -> Tuple[Counter, Counter]:
+    """Count pattern matches in ``path[start:end]``.
+
+    Returns ``(counts, windowed)`` where ``windowed`` maps
+    ``(pattern, window_id)`` to counts for timestamped lines.
+    """
+    matcher = _matcher(patterns)
+    counts: Counter = Counter()
+    windowed: Counter = Counter()
+    last_timestamp = None
+    with open(path, "rb") as handle, \
+            mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            stop = min(end, pos + BLOCK_BYTES)
+            if stop < end:
+                newline = mm.find(b"\n", stop, end)
+                stop = end if newline == -1 else newline + 1
+            text = mm[pos:stop].decode("utf-8", errors="replace")
+            for line, matched in matcher.iter_matches(text):
+                counts.update(matched)
+                last_timestamp = parse_timestamp(line) or last_timestamp
+                if last_timestamp is not None:
+                    window_id = int(last_timestamp // window_seconds)
+                    for name, n in matched.items():
+                        windowed[(name, window_id)] += n
+            pos = stop
+    return counts, windowed
+
+
+def analyze_file_sharded(path, patterns: Mapping[str, str], *,
+                         workers: Optional[int] = None,
+                         window_seconds: float = 60.0, start: int = 0,
+                         end: Optional[int] = None) -> Tuple[Counter, Counter]:
+    """Analyze ``path[start:end]`` across a process pool and merge the shard results."""
+    workers = workers or os.cpu_count() or 1
+    key = tuple(patterns.items())
+    offsets = shard_offsets(path, workers * SHARDS_PER_WORKER, start, end)
+    counts: Counter = Counter()
+    windowed: Counter = Counter()
+    if workers == 1 or len(offsets) <= 1:
+        results = [analyze_shard(path, s, e, key, window_seconds) for s, e in offsets]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                analyze_shard, *zip(*[(path, s, e, key, window_seconds)
+                                      for s, e in offsets])))
+    for shard_counts, shard_windowed in results:
+        counts.update(shard_counts)
+        windowed.update(shard_windowed)
+    return counts, windowed
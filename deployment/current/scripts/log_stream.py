@@ -0,0 +1,142 @@
+"""Line-by-line log sources and periodic snapshots for long-running analysis.
+
+Sources are plain iterators of lines, so memory stays constant however much
+is read: a file, stdin, or ``kubectl logs -f`` on every pod of an app. Live
+sources also yield ``None`` as a heartbeat when nothing arrived for a while,
+which lets :func:`stream_snapshots` keep reporting on a quiet stream.
+"""
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+DEFAULT_HEARTBEAT = 1.0
+MAX_BUFFERED_LINES = 10000
+
+_EOF = object()
+
+
+def file_lines(path) -> Iterator[str]:
+    """Lines of ``path``, or of stdin when ``path`` is ``-``."""
+    if path == "-":
+        yield from pump_lines([sys.stdin])
+        return
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        yield from handle
+
+
+def pump_lines(streams, *, heartbeat=DEFAULT_HEARTBEAT) -> Iterator[Optional[str]]:
+    """Merge the lines of several blocking text streams read by background threads.
+
+    Yields ``None`` after ``heartbeat`` seconds without input and returns once
+    every stream is exhausted. The hand-off queue is bounded, so a slow
+    consumer applies back-pressure instead of buffering without limit.
+    """
+    lines: "queue.Queue" = queue.Queue(maxsize=MAX_BUFFERED_LINES)
+
+    def read(stream):
+        try:
+            for line in stream:
+                lines.put(line)
+        finally:
+            lines.put(_EOF)
+
+    for stream in streams:
+        threading.Thread(target=read, args=(stream,), daemon=True,
+                         name="log-reader").start()
+    remaining = len(streams)
+    while remaining:
+        try:
+            line = lines.get(timeout=heartbeat)
+        except queue.Empty:
+            yield None
+            continue
+        if line is _EOF:
+            remaining -= 1
+        else:
+            yield line
+
+
+def follow_pods(collector, app_name, container="daprd", *, tail=0,
+                heartbeat=DEFAULT_HEARTBEAT) -> Iterator[Optional[str]]:
+    """Follow ``kubectl logs -f`` of every pod of ``app_name`` as one line stream."""
+    pods = [pod for pod, containers in collector.list_pods(app_name)
+            if container in containers]
+    processes = [
+        subprocess.Popen(
+            collector.command("logs", "-f", pod, "-c", container, f"--tail={tail}"),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            errors="replace")
+        for pod in pods
+    ]
+    try:
+        yield from pump_lines([p.stdout for p in processes], heartbeat=heartbeat)
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+
+def stream_snapshots(
+    lines: Iterable[Optional[str]],
+    update: Callable[[str], None],
+    snapshot: Callable[[], Dict],
+    *,
+    interval: float = 10.0,
+    clock: Callable[[], float] = time.monotonic,
+) -> Iterator[Dict]:
+    """Feed each line to ``update`` and yield ``snapshot()`` every ``interval`` seconds.
+
+    Each snapshot gets ``timestamp``, ``lines_seen`` and ``final`` keys; a
+    final snapshot is always yielded when ``lines`` ends.
+    """
+    seen = 0
+    next_at = clock() + interval
+
+    def stamped(final: bool) -> Dict:
+        report = snapshot()
+        report.update(timestamp=datetime.now().isoformat(), lines_seen=seen, final=final)
+        return report
+
+    for line in lines:
+        if line is not None:
+            seen += 1
+            update(line)
+        if clock() >= next_at:
+            yield stamped(False)
+            next_at = clock() + interval
+    yield stamped(True)
+
+
+def add_stream_arguments(parser) -> None:
+    """Options shared by both analyzers for watching a log stream."""
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", metavar="PATH",
+                        help="Analyze a log file line by line ('-' reads stdin).")
+    source.add_argument("--follow", metavar="APP",
+                        help="Follow 'kubectl logs -f' on every pod of this app.")
+    parser.add_argument("--container", default="daprd",
+                        help="Container to follow with --follow (default: daprd).")
+    parser.add_argument("--interval", type=float, default=10.0,
+                        help="Seconds between report snapshots (default: 10).")
+
+
+def lines_from_args(args, collector) -> Iterator[Optional[str]]:
+    if args.follow:
+        return follow_pods(collector, args.follow, args.container)
+    return file_lines(args.file)
+
+
+def source_name(args) -> str:
+    return f"{args.follow}-{args.container}" if args.follow else args.file
+
+
+def snapshot_lines(snapshots: Iterable[Dict]) -> Iterator[str]:
+    """Snapshots as JSON lines, for piping into other tools."""
+    for report in snapshots:
+        yield json.dumps(report, default=list)
+
@@ -0,0 +1,165 @@
+"""Timestamp parsing and rolling per-window counters for the log analyzers.
+
+Counts are kept per ``(service, pattern)`` in a fixed-size ring of time
+windows, so memory is bounded by ``services x patterns x slots`` no matter
+how long a watcher runs. A window whose count jumps well above the average of
+the windows before it is reported as a spike.
+"""
+import calendar
+import re
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# ISO 8601 / RFC 3339 as written by daprd (time="...Z"), kubectl --timestamps
+# and the services' JSON logs ("ts"), plus logging's %(asctime)s
+# ("2024-05-01 10:00:00,123"). Timestamps without an offset are taken as UTC,
+# which is what the pods run in.
+TIMESTAMP_RE = re.compile(
+    r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)"
+    r"(?:[.,](\d{1,9}))?(Z|[+-]\d\d:?\d\d)?")
+SEARCH_PREFIX = 160
+
+
+def parse_timestamp(line: str) -> Optional[float]:
+    """Epoch seconds of the first timestamp near the start of ``line``, if any."""
+    m = TIMESTAMP_RE.search(line, 0, SEARCH_PREFIX)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = m.groups()
+    try:
+        seconds = calendar.timegm((int(year), int(month), int(day),
+                                   int(hour), int(minute), int(second)))
+    except ValueError:
+        return None
+    if fraction:
+        seconds += int(fraction) / 10 ** len(fraction)
+    if zone and zone != "Z":
+        sign = 1 if zone[0] == "+" else -1
+        offset = zone[1:].replace(":", "")
+        seconds -= sign * (int(offset[:2]) * 3600 + int(offset[2:]) * 60)
+    return seconds
+
+
+class RingCounter:
+    """Counts for the last ``slots`` windows of ``window`` seconds each."""
+
+    __slots__ = ("window", "slots", "counts", "ids", "first", "latest")
+
+    def __init__(self, window: float, slots: int):
+        self.window = window
+        self.slots = slots
+        self.counts = array("L", [0]) * slots
+        self.ids = array("q", [-1]) * slots
+        self.first = None
+        self.latest = -1
+
+    def add(self, timestamp: float, n: int = 1) -> None:
+        window_id = int(timestamp // self.window)
+        if window_id <= self.latest - self.slots:
+            return  # older than anything the ring still holds
+        i = window_id % self.slots
+        if self.ids[i] != window_id:
+            self.ids[i] = window_id
+            self.counts[i] = 0
+        self.counts[i] += n
+        self.latest = max(self.latest, window_id)
+        if self.first is None or window_id < self.first:
+            self.first = window_id
+
+    def series(self, end_id: int, start_id: Optional[int] = None) -> List[int]:
+        """Counts of the windows up to ``end_id`` still in the ring, oldest first."""
+        start_id = end_id - self.slots + 1 if start_id is None else start_id
+        out = []
+        for window_id in range(max(start_id, end_id - self.slots + 1), end_id + 1):
+            i = window_id % self.slots
+            out.append(self.counts[i] if self.ids[i] == window_id else 0)
+        return out
+
+
+class WindowedAggregator:
+    """Rolling per-service, per-pattern counts with spike detection.
+
+    "Now" is the newest timestamp seen in any log, so replaying an old file
+    behaves like watching it live.
+    """
+
+    def __init__(self, window_seconds=60.0, slots=60, recent_windows=5,
+                 spike_factor=3.0, min_spike_count=5):
+        self.window = window_seconds
+        self.slots = slots
+        self.recent_windows = min(recent_windows, slots)
+        self.spike_factor = spike_factor
+        self.min_spike_count = min_spike_count
+        self._rings: Dict[Tuple[str, str], RingCounter] = {}
+        self.latest: Optional[float] = None
+
+    def add(self, service: str, pattern: str, timestamp: float, n: int = 1) -> None:
+        ring = self._rings.get((service, pattern))
+        if ring is None:
+            ring = self._rings[(service, pattern)] = RingCounter(self.window, self.slots)
+        ring.add(timestamp, n)
+        if self.latest is None or timestamp > self.latest:
+            self.latest = timestamp
+
+    def to_dict(self) -> Dict:
+        """JSON-able state (only windows still in the rings), for checkpoints."""
+        rings = []
+        for (service, pattern), ring in self._rings.items():
+            windows = [[ring.ids[i], ring.counts[i]]
+                       for i in range(ring.slots) if ring.ids[i] >= 0]
+            rings.append([service, pattern, ring.first, windows])
+        return {"window_seconds": self.window, "latest": self.latest, "rings": rings}
+
+    def load(self, data: Optional[Dict]) -> None:
+        """Restore :meth:`to_dict` state saved with the same window size."""
+        if not data or data.get("window_seconds") != self.window:
+            return
+        for service, pattern, first, windows in data["rings"]:
+            for window_id, count in sorted(windows):
+                self.add(service, pattern, window_id * self.window, count)
+            self._rings[(service, pattern)].first = first
+        if data["latest"] is not None:
+            self.latest = max(self.latest or data["latest"], data["latest"])
+
+    def clear(self) -> None:
+        self._rings.clear()
+        self.latest = None
+
+    def _now_id(self) -> int:
+        return int(self.latest // self.window)
+
+    def recent(self, service: str) -> Optional[Dict[str, int]]:
+        """Per-pattern counts over the last ``recent_windows`` windows.
+
+        ``None`` if no timestamped line has been seen for ``service``.
+        """
+        if self.latest is None:
+            return None
+        now_id = self._now_id()
+        recent = {pattern: sum(ring.series(now_id, now_id - self.recent_windows + 1))
+                  for (svc, pattern), ring in self._rings.items() if svc == service}
+        return recent or None
+
+    def spikes(self) -> List[Dict]:
+        """Patterns whose current-window count is far above their baseline.
+
+        The baseline is the mean of the earlier windows since the pattern was
+        first seen, so a pattern that bursts on first appearance is a spike.
+        """
+        if self.latest is None:
+            return []
+        now_id = self._now_id()
+        found = []
+        for (service, pattern), ring in sorted(self._rings.items()):
+            *history, current = ring.series(now_id, ring.first)
+            baseline = sum(history) / len(history) if history else 0.0
+            if (current >= self.min_spike_count
+                    and current > self.spike_factor * max(baseline, 1.0)):
+                found.append({
+                    "service": service,
+                    "pattern": pattern,
+                    "count": current,
+                    "baseline_per_window": round(baseline, 2),
+                    "window_seconds": self.window,
+                })
+        return found
@@ -0,0 +1,441 @@
+import importlib.util
+import os
+import re
+import json
+import stat
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from log_checkpoint import CheckpointStore
+from log_collector import LogCollector, combined_logs
+from log_matcher import LogMatcher
+from log_shards import analyze_file_sharded, shard_offsets
+from log_stream import file_lines, follow_pods, stream_snapshots
+from log_windows import RingCounter, WindowedAggregator, parse_timestamp
+
+SCRIPTS = Path(__file__).resolve().parent
+
+FAKE_KUBECTL = r"""#!/bin/sh
+# Minimal kubectl stand-in: "get pods -l app=X -o json" and "logs POD -c C".
+if [ "$1" = "get" ]; then
+  app="${4#app=}"
+  printf '{"items": ['
+  i=0
+  while [ "$i" -lt "${FAKE_PODS:-2}" ]; do
+    [ "$i" -gt 0 ] && printf ','
+    printf '{"metadata": {"name": "%s-%d"}, "spec": {"containers": [{"name": "daprd"}, {"name": "%s"}]}}' "$app" "$i" "$app"
+    i=$((i + 1))
+  done
+  printf ']}'
+  exit 0
+fi
+if [ "$1" = "logs" ]; then
+  shift
+  [ "$1" = "-f" ] && shift
+  pod="$1"; container="$3"
+  if [ "$pod" = "${FAKE_SLOW_POD:-}" ]; then sleep 5; fi
+  sleep "${FAKE_DELAY:-0}"
+  [ -n "${FAKE_ARGS_LOG:-}" ] && echo "$*" >> "$FAKE_ARGS_LOG"
+  if [ -n "${FAKE_LOG_FILE:-}" ]; then
+    # Already written as kubectl --timestamps output.
+    cat "$FAKE_LOG_FILE"
+    exit 0
+  fi
+  # Like kubectl, --timestamps prefixes every line with its RFC 3339 time.
+  prefix=""
+  case " $* " in *" --timestamps "*) prefix="2024-05-01T09:00:00.000000000Z ";; esac
+  {
+    if [ "$container" = "daprd" ]; then
+      echo "time=now level=info msg=\"dapr initialized. Status: Running\" pod=$pod"
+      echo "time=now level=warning msg=\"Failed to connect to scheduler host\" pod=$pod"
+    else
+      echo "INFO: \"POST /orders-handler HTTP/1.1\" 200 OK pod=$pod"
+    fi
+  } | sed "s/^/$prefix/"
+  exit 0
+fi
+echo "unsupported: $*" >&2
+exit 1
+"""
+
+
+def _load_script(filename, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fake_kubectl(tmp_path, monkeypatch):
+    path = tmp_path / "kubectl"
+    path.write_text(FAKE_KUBECTL)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return path
+
+
+def test_collector_fetches_every_pod_and_container(fake_kubectl, monkeypatch):
+    monkeypatch.setenv("FAKE_PODS", "3")
+    collected = LogCollector().collect({"order-service": ["daprd", "order-service"]})
+
+    dapr = collected["order-service"]["daprd"]
+    assert sorted(e.pod for e in dapr) == ["order-service-0", "order-service-1",
+                                           "order-service-2"]
+    assert all(e.error is None for e in dapr)
+    assert "pod=order-service-2" in combined_logs(dapr)
+    assert len(collected["order-service"]["order-service"]) == 3
+
+
+def test_collector_time_tracks_slowest_pod_not_total(fake_kubectl, monkeypatch):
+    monkeypatch.setenv("FAKE_PODS", "10")
+    monkeypatch.setenv("FAKE_DELAY", "1")
+    started = time.monotonic()
+    collected = LogCollector(max_workers=20).collect(
+        {"product-service": ["daprd", "product-service"]})
+    elapsed = time.monotonic() - started
+
+    assert sum(len(v) for v in collected["product-service"].values()) == 20
+    # 20 fetches of 1s each take 20s sequentially and about 1s concurrently;
+    # half the sequential time leaves a wide margin for a loaded machine.
+    assert elapsed < 10
+
+
+def test_collector_times_out_slow_pod_without_losing_others(fake_kubectl, monkeypatch):
+    monkeypatch.setenv("FAKE_PODS", "3")
+    monkeypatch.setenv("FAKE_SLOW_POD", "order-service-1")
+    collected = LogCollector(timeout=0.5).collect({"order-service": ["daprd"]})
+
+    by_pod = {e.pod: e for e in collected["order-service"]["daprd"]}
+    assert "timed out" in by_pod["order-service-1"].error
+    assert by_pod["order-service-0"].error is None
+    assert "dapr initialized" in by_pod["order-service-2"].logs
+
+
+def test_collector_reports_missing_kubectl(monkeypatch, tmp_path):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    collected = LogCollector().collect({"order-service": ["daprd"]})
+
+    [entry] = collected["order-service"]["daprd"]
+    assert entry.error.startswith("listing pods failed")
+
+
+def test_reports_cover_all_replicas(fake_kubectl, monkeypatch):
+    monkeypatch.setenv("FAKE_PODS", "4")
+    basic = _load_script("16-log-analyzer.py", "log_analyzer_16").DaprLogAnalyzer()
+    enhanced = _load_script("17-enhanced-log-analyzer.py",
+                            "log_analyzer_17").EnhancedDaprLogAnalyzer()
+
+    report = basic.generate_report()
+    assert report["services"]["order-service"]["pods"] == 4
+    assert len(report["services"]["order-service"]["dapr"]["errors"]) == 4
+
+    report = enhanced.generate_enhanced_report()
+    dapr = report["services"]["product-service"]["dapr"]
+    assert dapr["issues"]["scheduler_errors"] == 4
+    assert dapr["issues"]["sidecar_ready"] == 4
+
+
+SAMPLE_LOGS = """\
+level=info msg="dapr initialized. Status: Running"
+level=warning msg="Failed to connect to scheduler host: dial tcp" retry=1
+level=warning msg="failed to connect to scheduler host" retry=2
+level=error msg="error loading component pubsub: missing credentials"
+level=info msg="component loaded successfully" name=pubsub type=pubsub.aws.snssqs
+INFO: "POST /orders-handler HTTP/1.1" 200 OK
+INFO: "GET /orders/9 HTTP/1.1" 404 Not Found
+level=info msg="application discovered on port 8000"
+no trailing newline: Failed to connect to scheduler host"""
+
+
+def test_matcher_counts_match_per_pattern_findall():
+    enhanced = _load_script("17-enhanced-log-analyzer.py", "log_analyzer_17")
+    patterns = {name: config["pattern"]
+                for name, config in enhanced.EnhancedDaprLogAnalyzer().insights.items()}
+    counts = LogMatcher(patterns).count(SAMPLE_LOGS)
+
+    for name, pattern in patterns.items():
+        assert counts[name] == len(re.findall(pattern, SAMPLE_LOGS, re.IGNORECASE))
+    assert counts["scheduler_errors"] == 3
+    assert LogMatcher(patterns).count_lines(SAMPLE_LOGS.splitlines()) == counts
+
+
+def test_matcher_classifies_lines():
+    matcher = LogMatcher({"http_errors": r'HTTP/1.1" [45]\d\d',
+                          "pubsub_error": r"error publishing message"})
+
+    assert matcher.classify('"GET / HTTP/1.1" 503') == ["http_errors"]
+    assert matcher.classify("all good") == []
+
+
+def test_basic_analyzer_uses_compiled_patterns():
+    analyzer = _load_script("16-log-analyzer.py", "log_analyzer_16").DaprLogAnalyzer()
+    insights = analyzer.analyze_logs(SAMPLE_LOGS)
+
+    types = [error["type"] for error in insights["errors"]]
+    assert types.count("scheduler_connection") == 3
+    assert types.count("component_error") == 1
+    assert insights["status"] == "degraded"
+
+
+def test_watch_logs_matches_batch_analysis(tmp_path):
+    path = tmp_path / "daprd.log"
+    logs = (SAMPLE_LOGS + "\n") * 3
+    path.write_text(logs)
+    analyzer = _load_script("17-enhanced-log-analyzer.py",
+                            "log_analyzer_17").EnhancedDaprLogAnalyzer()
+
+    *_, final = analyzer.watch_logs(file_lines(path), "order-dapr")
+    batch = analyzer.analyze_logs_advanced(logs, "order-dapr")
+
+    assert final["final"] is True
+    assert final["lines_seen"] == 27
+    assert final["health_score"] == batch["health_score"]
+    assert dict(final["issues"]) == dict(batch["issues"])
+
+
+def test_stream_snapshots_emit_periodically():
+    ticks = iter(range(100))
+    seen = []
+    snapshots = list(stream_snapshots(
+        ["a", None, "b", "c", None], seen.append, lambda: {"n": len(seen)},
+        interval=2, clock=lambda: next(ticks)))
+
+    assert [s["n"] for s in snapshots] == [1, 3, 3]
+    assert [s["final"] for s in snapshots] == [False, False, True]
+
+
+def test_basic_watch_keeps_one_error_entry_per_type():
+    analyzer = _load_script("16-log-analyzer.py", "log_analyzer_16").DaprLogAnalyzer()
+
+    *_, final = analyzer.watch_logs(SAMPLE_LOGS.splitlines() * 100)
+
+    counts = {e["type"]: e["count"] for e in final["errors"]}
+    assert counts == {"scheduler_connection": 300, "component_error": 100}
+    assert final["status"] == "degraded"
+
+
+def test_cli_streams_snapshots_from_stdin():
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPTS / "17-enhanced-log-analyzer.py"), "--file", "-"],
+        input=SAMPLE_LOGS, capture_output=True, text=True, check=True, timeout=30)
+
+    final = json.loads(proc.stdout.splitlines()[-1])
+    assert final["final"] is True
+    assert final["issues"]["component_errors"] == 1
+
+
+def test_follow_pods_merges_every_pod(fake_kubectl, monkeypatch):
+    monkeypatch.setenv("FAKE_PODS", "3")
+    lines = [line for line in follow_pods(LogCollector(), "order-service", "daprd")
+             if line is not None]
+
+    assert len(lines) == 6
+    assert {line.split("pod=")[1].strip() for line in lines} == {
+        "order-service-0", "order-service-1", "order-service-2"}
+
+
+def test_parse_timestamp_formats():
+    base = parse_timestamp('time="2024-05-01T10:00:00Z" level=info')
+
+    assert base == 1714557600
+    assert parse_timestamp("2024-05-01 10:00:00,250 - app - INFO - ok") == base + 0.25
+    assert parse_timestamp('{"ts": "2024-05-01T10:00:00.500+00:00", "level": "INFO"}') == base + 0.5
+    assert parse_timestamp("2024-05-01T10:00:00.123456789Z POST /orders") == \
+        pytest.approx(base + 0.123456789)
+    assert parse_timestamp("2024-05-01T12:00:00+02:00 msg") == base
+    assert parse_timestamp('INFO: "POST /orders HTTP/1.1" 200') is None
+
+
+def test_ring_counter_memory_is_bounded():
+    ring = RingCounter(window=60, slots=10)
+    for minute in range(3 * 24 * 60):  # three days, one event per minute
+        ring.add(minute * 60.0)
+
+    assert len(ring.counts) == 10
+    assert ring.series(3 * 24 * 60 - 1) == [1] * 10
+    ring.add(0.0)  # far older than the ring: dropped
+    assert sum(ring.series(3 * 24 * 60 - 1)) == 10
+
+
+def test_aggregator_flags_spike_against_baseline():
+    windows = WindowedAggregator(window_seconds=60, slots=30)
+    for minute in range(20):
+        windows.add("order-dapr", "component_errors", minute * 60.0)
+    for _ in range(12):
+        windows.add("order-dapr", "component_errors", 20 * 60.0 + 5)
+        windows.add("order-dapr", "scheduler_errors", 20 * 60.0 + 5)
+
+    spikes = {s["pattern"]: s for s in windows.spikes()}
+    assert spikes["component_errors"]["count"] == 12
+    assert spikes["component_errors"]["baseline_per_window"] == 1.0
+    assert "scheduler_errors" in spikes  # bursts on first appearance
+
+    windows.add("order-dapr", "component_errors", 21 * 60.0)
+    assert "component_errors" not in {s["pattern"] for s in windows.spikes()}
+
+
+def test_old_error_burst_is_listed_but_not_scored():
+    analyzer = _load_script("17-enhanced-log-analyzer.py",
+                            "log_analyzer_17").EnhancedDaprLogAnalyzer()
+    old_burst = "".join(
+        f'time="2024-05-01T09:00:{i:02d}Z" level=error msg="error loading component snssqs"\n'
+        for i in range(10))
+    now = 'time="2024-05-01T10:00:00Z" level=info msg="dapr initialized"\n'
+
+    stale = analyzer.analyze_logs_advanced(old_burst + now, "order-dapr")
+    assert stale["issues"]["component_errors"] == 10
+    assert stale["health_score"] == 100
+    assert stale["anomalies"] == []
+
+    analyzer.windows.clear()
+    current = analyzer.analyze_logs_advanced(now + old_burst.replace("T09:", "T10:"),
+                                             "order-dapr")
+    assert current["health_score"] == 70
+    assert current["recent_issues"]["component_errors"] == 10
+    assert [a["pattern"] for a in current["anomalies"]] == ["component_errors"]
+
+
+def test_shard_offsets_are_line_aligned(tmp_path):
+    path = tmp_path / "big.log"
+    data = "".join(f"line {i} {'x' * (i % 17)}\n" for i in range(1000)).encode()
+    path.write_bytes(data)
+
+    offsets = shard_offsets(path, 7)
+
+    assert offsets[0][0] == 0 and offsets[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(offsets, offsets[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in offsets)
+    assert shard_offsets(tmp_path / "big.log", 1) == [(0, len(data))]
+
+
+def test_sharded_file_analysis_matches_in_memory(tmp_path, monkeypatch):
+    import log_shards
+
+    monkeypatch.setattr(log_shards, "BLOCK_BYTES", 256)
+    logs = (SAMPLE_LOGS + "\n") * 50 + 'time="2024-05-01T10:00:00Z" msg="dapr initialized"\n'
+    path = tmp_path / "daprd.log"
+    path.write_text(logs)
+    enhanced = _load_script("17-enhanced-log-analyzer.py", "log_analyzer_17")
+
+    from_file = enhanced.EnhancedDaprLogAnalyzer().analyze_file(str(path), "svc", workers=2)
+    in_memory = enhanced.EnhancedDaprLogAnalyzer().analyze_logs_advanced(logs, "svc")
+
+    assert dict(from_file["issues"]) == dict(in_memory["issues"])
+    assert from_file["health_score"] == in_memory["health_score"]
+    counts, windowed = analyze_file_sharded(
+        path, {"ready": "dapr initialized"}, workers=1)
+    assert counts["ready"] == 51
+    assert windowed[("ready", 1714557600 // 60)] == 1
+
+
+def test_cli_archive_mode_merges_files(tmp_path):
+    first, second = tmp_path / "a.log", tmp_path / "b.log"
+    first.write_text(SAMPLE_LOGS + "\n")
+    second.write_text("level=error msg=\"error loading component x\"\n")
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPTS / "17-enhanced-log-analyzer.py"),
+         "--archive", str(first), str(second), "--workers", "2"],
+        capture_output=True, text=True, check=True, timeout=60)
+
+    report = json.loads(proc.stdout)
+    assert set(report["files"]) == {str(first), str(second)}
+    assert report["summary"]["issues"]["component_errors"] == 2
+    assert {r["issue"] for r in report["summary"]["recommendations"]} == {
+        "component_errors", "scheduler_errors"}
+
+
+def test_checkpointed_runs_only_analyze_new_lines(fake_kubectl, monkeypatch, tmp_path):
+    logs = tmp_path / "pod.log"
+    logs.write_text(
+        '2024-05-01T10:00:00.100Z msg="Failed to connect to scheduler host"\n'
+        '2024-05-01T10:00:00.200Z msg="dapr initialized"\n')
+    args = tmp_path / "args.log"
+    monkeypatch.setenv("FAKE_PODS", "1")
+    monkeypatch.setenv("FAKE_LOG_FILE", str(logs))
+    monkeypatch.setenv("FAKE_ARGS_LOG", str(args))
+    state = tmp_path / "state.json"
+    basic = _load_script("16-log-analyzer.py", "log_analyzer_16")
+
+    first = basic.DaprLogAnalyzer().generate_report(CheckpointStore(state))
+    # kubectl --since-time only has second resolution: the same lines come
+    # back, plus a new one, and only the new one may be counted.
+    with logs.open("a") as handle:
+        handle.write('2024-05-01T10:00:00.300Z msg="Failed to connect to scheduler host"\n')
+    second = basic.DaprLogAnalyzer().generate_report(CheckpointStore(state))
+
+    # 2 services x 2 containers, all served the same log
+    assert first["new_lines"] == 8 and second["new_lines"] == 4
+    [error] = second["services"]["order-service"]["dapr"]["errors"]
+    assert error["type"] == "scheduler_connection" and error["count"] == 2
+    assert second["services"]["order-service"]["dapr"]["status"] == "degraded"
+    calls = args.read_text().splitlines()
+    assert not any("--since-time" in c for c in calls[:4])
+    assert "--since-time=2024-05-01T10:00:00Z" in calls[-1]
+    assert "--timestamps" in calls[-1]
+
+
+def test_enhanced_checkpoint_accumulates_issue_totals(fake_kubectl, monkeypatch, tmp_path):
+    logs = tmp_path / "pod.log"
+    logs.write_text('2024-05-01T10:00:00Z level=error msg="error loading component"\n')
+    monkeypatch.setenv("FAKE_PODS", "1")
+    monkeypatch.setenv("FAKE_LOG_FILE", str(logs))
+    state = tmp_path / "state.json"
+    enhanced = _load_script("17-enhanced-log-analyzer.py", "log_analyzer_17")
+
+    enhanced.EnhancedDaprLogAnalyzer().generate_enhanced_report(CheckpointStore(state))
+    unchanged = enhanced.EnhancedDaprLogAnalyzer().generate_enhanced_report(
+        CheckpointStore(state))
+    with logs.open("a") as handle:
+        handle.write('2024-05-01T10:00:05Z level=error msg="error loading component"\n')
+    grown = enhanced.EnhancedDaprLogAnalyzer().generate_enhanced_report(
+        CheckpointStore(state))
+
+    assert unchanged["summary"]["new_lines"] == 0
+    dapr = grown["services"]["order-service"]["dapr"]
+    assert dapr["issues"]["component_errors"] == 2
+    assert grown["summary"]["new_lines"] == 4
+
+
+def test_file_checkpoint_resumes_and_restarts_on_rotation(tmp_path):
+    path = tmp_path / "daprd.log"
+    path.write_text('msg="error loading component a"\nmsg="error loading comp')
+    store = CheckpointStore(tmp_path / "state.json")
+    enhanced = _load_script("17-enhanced-log-analyzer.py", "log_analyzer_17")
+    analyzer = enhanced.EnhancedDaprLogAnalyzer()
+
+    first = analyzer.analyze_file(str(path), "svc", workers=1, checkpoint=store)
+    # The partial last line is left for the next run.
+    with path.open("a") as handle:
+        handle.write('onent b"\n')
+    second = analyzer.analyze_file(str(path), "svc", workers=1, checkpoint=store)
+    store.save()
+    resumed = CheckpointStore(tmp_path / "state.json")
+    assert resumed.file_range(str(path)) == (path.stat().st_size,) * 2
+
+    path.write_text('msg="error loading component c"\n')  # truncated
+    third = analyzer.analyze_file(str(path), "svc", workers=1, checkpoint=resumed)
+
+    assert first["issues"]["component_errors"] == 1
+    assert second["issues"]["component_errors"] == 2
+    assert third["issues"]["component_errors"] == 3
+
+
+def test_checkpoint_timestamps_untimed_logs_so_reruns_add_nothing(
+        fake_kubectl, monkeypatch, tmp_path):
+    # The default fake output has no timestamps of its own (access logs...).
+    monkeypatch.setenv("FAKE_PODS", "1")
+    state = tmp_path / "state.json"
+    basic = _load_script("16-log-analyzer.py", "log_analyzer_16")
+
+    first = basic.DaprLogAnalyzer().generate_report(CheckpointStore(state))
+    second = basic.DaprLogAnalyzer().generate_report(CheckpointStore(state))
+
+    assert first["new_lines"] == 6
+    assert second["new_lines"] == 0
+    [error] = second["services"]["order-service"]["dapr"]["errors"]
+    assert error["count"] == 1
@@ -0,0 +1,244 @@
+"""Low-overhead Prometheus-style metrics shared by both services.
+
+Counters, gauges and histograms write to a per-thread shard, so the hot path
+is a thread-local dict update with no lock. Shards are only merged when
+``/metrics`` is scraped. Output follows the Prometheus text exposition
+format, so no client library is needed in the images.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Base for metrics whose samples live in per-thread dicts."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: dict = {}
+            with self._shards_lock:  # once per thread, never on the hot path
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _snapshot(self) -> List[dict]:
+        with self._shards_lock:
+            return [dict(shard) for shard in self._shards]
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Sharded):
+    """Monotonic counter; ``function`` exposes a value owned elsewhere."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        if self.function is not None:
+            return {(): self.function()}
+        merged: Dict[LabelValues, float] = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} "
+                         f"{_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Up/down gauge (summed across shards) or a callback read at scrape time."""
+
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [per-bucket counts..., +Inf count, sum]
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, labels: LabelValues = ()) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        merged: Dict[LabelValues, List[float]] = {}
+        for shard in self._snapshot():
+            for labels, state in shard.items():
+                acc = merged.setdefault(labels, [0] * len(state))
+                for i, value in enumerate(state):
+                    acc[i] += value
+        lines = self.header()
+        for labels, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: LabelValues) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Sharded] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = (),
+                function: Optional[Callable[[], float]] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording request count, latency and in-flight.
+
+    The route label is the matched route template (``/products/{product_id}``)
+    so label cardinality stays bounded; unmatched paths are grouped together.
+    """
+
+    def __init__(self, app, registry: Registry) -> None:
+        self.app = app
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests handled.",
+            ("method", "route", "status"))
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency.",
+            ("method", "route", "status"))
+        self.in_flight = registry.gauge(
+            "http_requests_in_progress", "HTTP requests being served.",
+            ("method",))
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = ["500"]
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        self.in_flight.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec((method,))
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            labels = (method, path, status[0])
+            self.requests.inc(labels)
+            self.latency.observe(elapsed, labels)
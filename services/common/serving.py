@@ -0,0 +1,81 @@
+"""Production uvicorn entry point shared by ProductService and OrderService.
+
+    python serving.py app:app --port 8001                      # in the image
+    python -m services.common.serving services.order_service.app:app --port 8002
+
+Every option falls back to an environment variable, so the same image can be
+tuned from the Kubernetes manifest:
+
+``WEB_CONCURRENCY``     worker processes (default 1, see below)
+``KEEP_ALIVE_SECONDS``  idle keep-alive timeout (default 65)
+``BACKLOG``             listen socket backlog (default 2048)
+``UVICORN_LOOP``        ``auto``, ``uvloop`` or ``asyncio`` (default auto)
+``UVICORN_HTTP``        ``auto``, ``httptools`` or ``h11`` (default auto)
+
+``auto`` picks uvloop and httptools, which ``uvicorn[standard]`` installs.
+
+Workers are separate processes and share nothing. Each one holds its own
+product catalog or order repository, idempotency cache, pipeline queue and
+metrics, and requests are spread over them per connection. A write served by
+one worker is therefore invisible to the others, a redelivered message can
+reach a worker that has not seen it, and ``/metrics`` describes one worker.
+Keep one worker (and scale with replicas) unless the process only serves
+read-mostly data loaded at start-up.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Any, Dict, List, Optional
+
+DEFAULT_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Longer than the 60 s idle timeout common in proxies and load balancers, so
+# the server never closes a connection a client is about to reuse.
+DEFAULT_KEEP_ALIVE = int(os.getenv("KEEP_ALIVE_SECONDS", "65"))
+DEFAULT_BACKLOG = int(os.getenv("BACKLOG", "2048"))
+DEFAULT_LOOP = os.getenv("UVICORN_LOOP", "auto")
+DEFAULT_HTTP = os.getenv("UVICORN_HTTP", "auto")
+
+
+def uvicorn_options(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Keyword arguments for ``uvicorn.run`` from the command line and environment."""
+    parser = argparse.ArgumentParser(description="Serve a service app with uvicorn.")
+    parser.add_argument("app", help="Import string, e.g. app:app.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--keep-alive", type=int, default=DEFAULT_KEEP_ALIVE)
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG)
+    parser.add_argument("--loop", choices=("auto", "uvloop", "asyncio"),
+                        default=DEFAULT_LOOP)
+    parser.add_argument("--http", choices=("auto", "httptools", "h11"),
+                        default=DEFAULT_HTTP)
+    parser.add_argument("--log-level", default="info",
+                        help="uvicorn's own log level; the apps use LOG_LEVEL.")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false",
+                        help="Drop uvicorn's per-request access log lines.")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return {
+        "app": args.app,
+        "host": args.host,
+        "port": args.port,
+        "workers": args.workers,
+        "timeout_keep_alive": args.keep_alive,
+        "backlog": args.backlog,
+        "loop": args.loop,
+        "http": args.http,
+        "log_level": args.log_level,
+        "access_log": args.access_log,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    uvicorn.run(**uvicorn_options(argv))
+
+
+if __name__ == "__main__":
+    main()
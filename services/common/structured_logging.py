@@ -0,0 +1,114 @@
+"""Structured, non-blocking logging shared by ProductService and OrderService.
+
+Handlers log with ``%s`` placeholders and wrap payloads in :func:`summarize`,
+so nothing is serialized unless a record is actually emitted. Records are
+pushed onto an in-memory queue and formatted as JSON lines by a background
+``QueueListener`` thread, keeping I/O and formatting off the request path.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+MAX_PAYLOAD_CHARS = int(os.getenv("LOG_MAX_PAYLOAD_CHARS", "512"))
+MAX_PAYLOAD_ITEMS = int(os.getenv("LOG_MAX_PAYLOAD_ITEMS", "3"))
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _jsonable(obj: Any) -> Any:
+    dump = getattr(obj, "model_dump", None)
+    if callable(dump):
+        return dump()
+    return obj
+
+
+class summarize:
+    """Lazy log argument: renders ``obj`` truncated, only when formatted.
+
+    Sequences longer than ``max_items`` are shown as their length plus the
+    first few items, and the rendered text is capped at ``max_chars``.
+    """
+
+    __slots__ = ("obj", "max_chars", "max_items")
+
+    def __init__(self, obj: Any, max_chars: int = MAX_PAYLOAD_CHARS,
+                 max_items: int = MAX_PAYLOAD_ITEMS) -> None:
+        self.obj = obj
+        self.max_chars = max_chars
+        self.max_items = max_items
+
+    def __str__(self) -> str:
+        obj = self.obj
+        if isinstance(obj, (list, tuple)) and len(obj) > self.max_items:
+            head = [_jsonable(item) for item in obj[: self.max_items]]
+            text = (f"<{len(obj)} items, first {self.max_items}: "
+                    f"{json.dumps(head, default=str)}>")
+        else:
+            if isinstance(obj, (list, tuple)):
+                obj = [_jsonable(item) for item in obj]
+            try:
+                text = json.dumps(_jsonable(obj), default=str)
+            except (TypeError, ValueError):
+                text = repr(obj)
+        if len(text) > self.max_chars:
+            text = f"{text[: self.max_chars]}...<{len(text)} chars>"
+        return text
+
+    __repr__ = __str__
+
+
+class JsonFormatter(logging.Formatter):
+    """Render each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock QueueHandler formats in the calling thread; hand the record
+    # over so the listener thread does the work instead. summarize() args are
+    # the exception: they wrap live objects a request may still mutate, so
+    # they are rendered here, once the record is known to be emitted.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, tuple) and any(
+                isinstance(arg, summarize) for arg in record.args):
+            record.args = tuple(str(arg) if isinstance(arg, summarize) else arg
+                                for arg in record.args)
+        return record
+
+
+def configure_logging(name: str) -> logging.Logger:
+    """Install the queue-backed root handler once and return ``name``'s logger."""
+    global _listener
+    if _listener is None:
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json"
+                            else logging.Formatter(TEXT_FORMAT))
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_DeferredQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    return logging.getLogger(name)
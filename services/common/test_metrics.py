@@ -0,0 +1,41 @@
+import threading
+
+from services.common.metrics import Registry
+
+
+def test_counter_merges_per_thread_shards():
+    registry = Registry()
+    counter = registry.counter("jobs_total", "Jobs.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(("a",))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.values() == {("a",): 4000}
+    assert 'jobs_total{kind="a"} 4000' in registry.render()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        hist.observe(value)
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_callback_gauge_reads_value_at_scrape_time():
+    registry = Registry()
+    depth = [3]
+    registry.gauge("queue_depth", "Depth.", function=lambda: depth[0])
+    depth[0] = 7
+    assert "queue_depth 7" in registry.render()
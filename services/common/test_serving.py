@@ -0,0 +1,25 @@
+import pytest
+
+from services.common import serving
+
+
+def test_uvicorn_options_from_flags():
+    options = serving.uvicorn_options(
+        ["app:app", "--port", "8001", "--workers", "4", "--keep-alive", "30",
+         "--backlog", "4096", "--loop", "uvloop", "--http", "httptools"])
+    assert options["app"] == "app:app"
+    assert options["port"] == 8001
+    assert options["workers"] == 4
+    assert options["timeout_keep_alive"] == 30
+    assert options["backlog"] == 4096
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+    assert options["access_log"] is True
+
+
+def test_uvicorn_options_defaults_to_one_worker(monkeypatch):
+    monkeypatch.setattr(serving, "DEFAULT_WORKERS", 1)
+    options = serving.uvicorn_options(["app:app"])
+    assert options["workers"] == 1
+    assert options["timeout_keep_alive"] == serving.DEFAULT_KEEP_ALIVE
+    with pytest.raises(SystemExit):
+        serving.uvicorn_options(["app:app", "--workers", "0"])
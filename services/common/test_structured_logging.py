@@ -0,0 +1,52 @@
+import json
+import logging
+import queue
+
+from services.common.structured_logging import (JsonFormatter, _DeferredQueueHandler,
+                                                summarize)
+
+
+class _Counting:
+    calls = 0
+
+    def model_dump(self):
+        _Counting.calls += 1
+        return {"id": 1}
+
+
+def test_summarize_truncates_long_sequences_and_text():
+    text = str(summarize(list(range(100)), max_items=2))
+    assert text.startswith("<100 items, first 2: [0, 1]>")
+    long_text = str(summarize({"blob": "x" * 1000}, max_chars=50))
+    assert long_text.endswith("chars>")
+    assert len(long_text) < 100
+
+
+def test_summarize_is_lazy_when_level_disabled():
+    logger = logging.getLogger("test.structured_logging.lazy")
+    logger.setLevel(logging.WARNING)
+    logger.info("payload %s", summarize(_Counting()))
+    assert _Counting.calls == 0
+    assert str(summarize(_Counting())) == '{"id": 1}'
+    assert _Counting.calls == 1
+
+
+def test_queue_handler_snapshots_summarized_args():
+    records = queue.SimpleQueue()
+    payload = {"status": "pending"}
+    record = logging.LogRecord("svc", logging.INFO, __file__, 1, "order %s %s",
+                               (summarize(payload), 7), None)
+    _DeferredQueueHandler(records).handle(record)
+    payload["status"] = "shipped"  # changed before the listener formats it
+
+    assert records.get_nowait().getMessage() == 'order {"status": "pending"} 7'
+
+
+def test_json_formatter_emits_one_object_per_record():
+    record = logging.LogRecord("svc", logging.INFO, __file__, 1,
+                               "API: GET /health - Output: %s",
+                               ({"status": "ok"},), None)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "svc"
+    assert entry["message"] == "API: GET /health - Output: {'status': 'ok'}"
@@ -1,75 +1,287 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-import logging
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+try:
+    from ..common.metrics import CONTENT_TYPE, PrometheusMiddleware, Registry
+    from ..common.structured_logging import configure_logging, summarize
+    from .idempotency import SeenIdCache
+    from .pipeline import OrderPipeline
+    from .repository import DuplicateOrderError, Order, OrderRepository
+except ImportError:  # running as a flat module inside the container image
+    from metrics import CONTENT_TYPE, PrometheusMiddleware, Registry
+    from structured_logging import configure_logging, summarize
+    from idempotency import SeenIdCache
+    from pipeline import OrderPipeline
+    from repository import DuplicateOrderError, Order, OrderRepository
 
-app = FastAPI(title="OrderService")
+logger = configure_logging(__name__)
 
+metrics = Registry()
+processing_latency = metrics.histogram(
+    "order_message_processing_seconds",
+    "Time spent processing one pub/sub order message.", ("outcome",))
 
-class Order(BaseModel):
-    id: int
-    product_id: int
-    quantity: int
+_orders = OrderRepository([Order(id=1, product_id=1, quantity=2)])
 
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
 
-_orders = [Order(id=1, product_id=1, quantity=2)]
+# Off by default: the declarative Subscription in deployment/current/k8s already
+# routes the orders topic to /orders-handler, and a programmatic bulk one for the
+# same topic would conflict with it. Enable only where that manifest is absent.
+BULK_SUBSCRIBE_ENABLED = os.getenv(
+    "BULK_SUBSCRIBE_ENABLED", "false").lower() in ("1", "true", "yes")
+BULK_SUBSCRIBE_MAX_MESSAGES = int(os.getenv("BULK_SUBSCRIBE_MAX_MESSAGES", "100"))
+BULK_SUBSCRIBE_MAX_AWAIT_MS = int(os.getenv("BULK_SUBSCRIBE_MAX_AWAIT_MS", "1000"))
+
+_seen = SeenIdCache(
+    max_size=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "100000")),
+    ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600")),
+    db_path=os.getenv("IDEMPOTENCY_DB_PATH") or None,
+)
+
+PIPELINE_DRAIN_SECONDS = float(os.getenv("ORDER_PIPELINE_DRAIN_SECONDS", "30"))
+
+
+def _process_order_event(event: dict) -> None:
+    order_data = event.get("data", {})
+    logger.info("Processing order from pub/sub: %s", summarize(order_data))
+
+
+def _run_queued_event(item: Tuple[Optional[str], dict]) -> None:
+    start = time.perf_counter()
+    try:
+        _process_order_event(item[1])
+    except Exception:
+        processing_latency.observe(time.perf_counter() - start, ("error",))
+        raise
+    processing_latency.observe(time.perf_counter() - start, ("ok",))
+
+
+def _on_queued_event_error(item: Tuple[Optional[str], dict], exc: BaseException) -> None:
+    # The message was already acknowledged; forget the key so a redelivery
+    # (e.g. after a restart) is not mistaken for a duplicate.
+    if item[0] is not None:
+        _seen.discard(item[0])
+
+
+_pipeline = OrderPipeline(
+    _run_queued_event,
+    workers=int(os.getenv("ORDER_PIPELINE_WORKERS", "4")),
+    max_queue=int(os.getenv("ORDER_PIPELINE_QUEUE_SIZE", "1000")),
+    on_error=_on_queued_event_error,
+)
+
+metrics.gauge("order_pipeline_queue_depth", "Order messages waiting for a worker.",
+              function=lambda: _pipeline.depth)
+metrics.counter("order_pipeline_rejected_total",
+                "Order messages refused with RETRY because the queue was full.",
+                function=lambda: _pipeline.rejected)
+metrics.counter("idempotency_cache_hits_total",
+                "Redelivered messages recognised as duplicates.",
+                function=lambda: _seen.hits)
+metrics.counter("idempotency_cache_misses_total",
+                "Messages seen for the first time.",
+                function=lambda: _seen.misses)
+metrics.gauge("idempotency_cache_size", "Keys held in the seen-id cache.",
+              function=lambda: len(_seen))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _pipeline.start()
+    yield
+    await asyncio.to_thread(_pipeline.shutdown, PIPELINE_DRAIN_SECONDS)
+
+
+app = FastAPI(title="OrderService", lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware, registry=metrics)
+
+
+def _ndjson(pages: Iterable[List[Order]]) -> Iterator[str]:
+    for batch in pages:
+        yield "".join(o.model_dump_json() + "\n" for o in batch)
 
 
 @app.get("/health")
-def health():
+async def health():
     logger.info("API: GET /health - Input: None")
     result = {"status": "ok"}
-    logger.info(f"API: GET /health - Output: {result}")
+    logger.info("API: GET /health - Output: %s", result)
     return result
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/orders", response_model=List[Order])
-def list_orders():
-    logger.info("API: GET /orders - Input: None")
-    result = _orders
+async def list_orders(response: Response,
+                      start_id: Optional[int] = None,
+                      end_id: Optional[int] = None,
+                      cursor: Optional[int] = None,
+                      limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                      stream: bool = False):
     logger.info(
-        f"API: GET /orders - Output: {[order.dict() for order in result]}")
+        "API: GET /orders - Input: start_id=%s, end_id=%s, cursor=%s, "
+        "limit=%s, stream=%s", start_id, end_id, cursor, limit, stream)
+    if cursor is not None:
+        start_id = cursor + 1 if start_id is None else max(start_id, cursor + 1)
+    if stream and limit is None:
+        logger.info("API: GET /orders - Output: streaming NDJSON")
+        return StreamingResponse(
+            _ndjson(_orders.iter_pages(start_id, end_id, STREAM_BATCH_SIZE)),
+            media_type="application/x-ndjson")
+    result = _orders.id_range(start_id, end_id, limit)
+    if stream:
+        response = StreamingResponse(_ndjson([result]),
+                                     media_type="application/x-ndjson")
+    if limit is not None and len(result) == limit:
+        response.headers["X-Next-Cursor"] = str(result[-1].id)
+    if stream:
+        return response
+    logger.info("API: GET /orders - Output: %s", summarize(result))
     return result
 
 
 @app.post("/orders", response_model=Order, status_code=201)
-def create_order(o: Order):
-    logger.info(f"API: POST /orders - Input: {o.dict()}")
-    for existing in _orders:
-        if existing.id == o.id:
-            logger.error(
-                f"API: POST /orders - Error: ID {o.id} already exists")
-            raise HTTPException(status_code=400, detail="ID already exists")
-    _orders.append(o)
-    logger.info(f"API: POST /orders - Output: {o.dict()}")
+async def create_order(o: Order):
+    logger.info("API: POST /orders - Input: %s", summarize(o))
+    try:
+        _orders.add(o)
+    except DuplicateOrderError:
+        logger.error("API: POST /orders - Error: ID %s already exists", o.id)
+        raise HTTPException(status_code=400, detail="ID already exists")
+    logger.info("API: POST /orders - Output: %s", summarize(o))
     return o
 
 
+@app.get("/orders/{order_id}", response_model=Order)
+async def get_order(order_id: int):
+    logger.info("API: GET /orders/%s - Input: order_id=%s", order_id, order_id)
+    o = _orders.get(order_id)
+    if o is not None:
+        logger.info("API: GET /orders/%s - Output: %s", order_id, summarize(o))
+        return o
+    logger.error("API: GET /orders/%s - Error: Order not found", order_id)
+    raise HTTPException(status_code=404, detail="Order not found")
+
+
+@app.get("/products/{product_id}/orders", response_model=List[Order])
+async def list_orders_for_product(product_id: int):
+    logger.info("API: GET /products/%s/orders - Input: product_id=%s",
+                product_id, product_id)
+    result = _orders.by_product(product_id)
+    logger.info("API: GET /products/%s/orders - Output: %s",
+                product_id, summarize(result))
+    return result
+
+
 @app.get("/dapr/subscribe")
 @app.post("/dapr/subscribe")
-def subscribe():
-    subscriptions = [{
+async def subscribe():
+    subscription = {
         "pubsubname": "pubsub",
         "topic": "orders",
         "route": "/orders-handler"
-    }]
-    logger.info(f"Dapr subscriptions: {subscriptions}")
+    }
+    if BULK_SUBSCRIBE_ENABLED:
+        subscription["route"] = "/orders-handler/bulk"
+        subscription["bulkSubscribe"] = {
+            "enabled": True,
+            "maxMessagesCount": BULK_SUBSCRIBE_MAX_MESSAGES,
+            "maxAwaitDurationMs": BULK_SUBSCRIBE_MAX_AWAIT_MS,
+        }
+    subscriptions = [subscription]
+    logger.info("Dapr subscriptions: %s", subscriptions)
     return subscriptions
 
 
+def _idempotency_key(event: dict) -> Optional[str]:
+    # Prefer the CloudEvent id; fall back to the order id inside the payload.
+    if event.get("id") is not None:
+        return f"event:{event['id']}"
+    data = event.get("data")
+    if isinstance(data, dict) and data.get("id") is not None:
+        return f"order:{data['id']}"
+    return None
+
+
+def _accept_order_event(event: dict) -> str:
+    """Dedupe and enqueue one event; return ``duplicate``, ``queued`` or ``full``."""
+    key = _idempotency_key(event)
+    if key is not None and _seen.check_and_add(key):
+        logger.info("Skipping duplicate pub/sub delivery: %s", key)
+        return "duplicate"
+    if not _pipeline.submit((key, event)):
+        if key is not None:
+            _seen.discard(key)
+        logger.warning("Order pipeline queue full, asking Dapr to retry")
+        return "full"
+    return "queued"
+
+
+async def _off_loop_if_persistent(fn, *args):
+    # With IDEMPOTENCY_DB_PATH every new key is written through to SQLite,
+    # which is blocking disk I/O; keep that off the event loop.
+    if _seen.persistent:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
 @app.post("/orders-handler")
-def handle_order_message(message: dict):
-    logger.info(f"Received Dapr message: {message}")
-    # Process the order message
+async def handle_order_message(message: dict):
+    logger.info("Received Dapr message: %s", summarize(message))
     try:
-        order_data = message.get("data", {})
-        logger.info(f"Processing order from pub/sub: {order_data}")
-        return {"status": "processed", "message": "Order received via Dapr"}
+        outcome = await _off_loop_if_persistent(_accept_order_event, message)
+        if outcome == "full":
+            return {"status": "RETRY", "message": "Order queue full"}
+        # Dapr only knows SUCCESS, RETRY and DROP and redelivers on anything else.
+        if outcome == "duplicate":
+            return {"status": "SUCCESS", "message": "Order already processed"}
+        return {"status": "SUCCESS", "message": "Order received via Dapr"}
     except Exception as e:
-        logger.error(f"Error processing Dapr message: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        logger.error("Error processing Dapr message: %s", e)
+        return {"status": "RETRY", "message": str(e)}
+
+
+def _accept_bulk_entries(entries: List[dict]) -> List[dict]:
+    statuses = []
+    for entry in entries:
+        entry_id = entry.get("entryId")
+        event = entry.get("event")
+        if not isinstance(event, dict):
+            # Non-CloudEvent payloads arrive as the raw event body.
+            event = {"data": event}
+        try:
+            ok = _accept_order_event(event) != "full"
+            statuses.append({"entryId": entry_id,
+                             "status": "SUCCESS" if ok else "RETRY"})
+        except Exception as e:
+            logger.error("Error processing Dapr bulk entry %s: %s", entry_id, e)
+            statuses.append({"entryId": entry_id, "status": "RETRY"})
+    return statuses
+
+
+@app.post("/orders-handler/bulk")
+async def handle_order_messages_bulk(message: dict):
+    entries = message.get("entries", [])
+    logger.info("Received Dapr bulk message: %s entries", len(entries))
+    statuses = await _off_loop_if_persistent(_accept_bulk_entries, entries)
+    return {"statuses": statuses}
+
+
+@app.get("/pipeline/stats")
+async def pipeline_stats():
+    return _pipeline.stats()
+
+
+@app.get("/idempotency/stats")
+async def idempotency_stats():
+    return _seen.stats()
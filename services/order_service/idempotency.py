@@ -0,0 +1,123 @@
+"""Bounded, TTL-evicting seen-id cache used to drop redelivered messages."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# Expired rows are pruned from the SQLite store once every this many writes.
+PRUNE_EVERY = 1000
+
+
+class SeenIdCache:
+    """Remember message keys for ``ttl_seconds``, holding at most ``max_size``.
+
+    Keys live in an ``OrderedDict`` in insertion order, so expiry and
+    size-based eviction both pop from the front and every operation is O(1).
+    When ``db_path`` is set, keys are written through to a local SQLite file
+    and unexpired ones are loaded back at start-up; lookups never touch disk.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100_000,
+        ttl_seconds: float = 3600.0,
+        *,
+        db_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        if db_path:
+            self._open_db(db_path)
+
+    @property
+    def persistent(self) -> bool:
+        """Whether new keys are written through to SQLite."""
+        return self._db is not None
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, key: object) -> bool:
+        expires = self._expiry.get(key)  # type: ignore[arg-type]
+        return expires is not None and expires > self._clock()
+
+    def check_and_add(self, key: str) -> bool:
+        """Return ``True`` if ``key`` was already seen, otherwise record it."""
+        now = self._clock()
+        with self._lock:
+            expires = self._expiry.get(key)
+            if expires is not None and expires > now:
+                self.hits += 1
+                return True
+            self.misses += 1
+            if expires is not None:
+                del self._expiry[key]
+            self._expiry[key] = now + self.ttl
+            self._evict(now)
+        if self._db is not None:
+            self._persist(key, now + self.ttl)
+        return False
+
+    def discard(self, key: str) -> None:
+        """Forget ``key`` so a redelivery is processed again (e.g. after a failure)."""
+        with self._lock:
+            self._expiry.pop(key, None)
+        if self._db is not None:
+            with self._lock, self._db:
+                self._db.execute("DELETE FROM seen_ids WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._expiry),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self, now: float) -> None:
+        while self._expiry:
+            key, expires = next(iter(self._expiry.items()))
+            if expires > now and len(self._expiry) <= self.max_size:
+                break
+            self._expiry.popitem(last=False)
+            self.evictions += 1
+
+    def _open_db(self, db_path: str) -> None:
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS seen_ids "
+                "(key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+            self._db.execute("DELETE FROM seen_ids WHERE expires <= ?",
+                             (self._clock(),))
+        rows = self._db.execute(
+            "SELECT key, expires FROM seen_ids ORDER BY expires DESC LIMIT ?",
+            (self.max_size,)).fetchall()
+        for key, expires in reversed(rows):
+            self._expiry[key] = expires
+
+    def _persist(self, key: str, expires: float) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO seen_ids (key, expires) VALUES (?, ?)",
+                (key, expires))
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._db.execute("DELETE FROM seen_ids WHERE expires <= ?",
+                                 (self._clock(),))
@@ -0,0 +1,147 @@
+"""Bounded in-process work queue drained by a pool of worker threads."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class OrderPipeline:
+    """Hand pub/sub work off the request path to ``workers`` threads.
+
+    ``submit`` never blocks: when ``max_queue`` items are already waiting it
+    returns ``False`` so the caller can ask Dapr to redeliver later. Workers
+    call ``handler(item)``; ``on_error(item, exc)`` runs if it raises.
+    ``shutdown`` stops intake, drains what is queued and joins the workers.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], None],
+        *,
+        workers: int = 4,
+        max_queue: int = 1000,
+        on_error: Optional[Callable[[Any, BaseException], None]] = None,
+    ) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_error = on_error
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._accepting = False
+        self._closing = False
+        self.submitted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self._wait_sum = 0.0
+        self._proc_sum = 0.0
+        self._proc_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._accepting:
+                return
+            self._accepting = True
+            self._threads = [
+                threading.Thread(target=self._run, name=f"order-worker-{i}",
+                                 daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, item: Any) -> bool:
+        if not self._accepting and not self._closing:
+            self.start()
+        try:
+            if self._closing:
+                raise queue.Full
+            self._queue.put_nowait((time.perf_counter(), item))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def shutdown(self, timeout: float = 30.0) -> bool:
+        """Drain queued work for up to ``timeout`` seconds; return ``True`` if empty."""
+        with self._lock:
+            if not self._accepting:
+                return True
+            self._accepting = False
+            self._closing = True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        drained = not self._queue.unfinished_tasks
+        if not drained:
+            logger.warning("Order pipeline shutdown with %s items still queued",
+                           self.depth)
+        for _ in self._threads:
+            try:
+                self._queue.put((0.0, _STOP),
+                                timeout=max(0.1, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()) or 0.1)
+        self._closing = False
+        return drained
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.processed + self.failed
+            return {
+                "workers": self.workers,
+                "queue_depth": self.depth,
+                "queue_capacity": self.max_queue,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "failed": self.failed,
+                "avg_queue_wait_seconds": self._wait_sum / done if done else 0.0,
+                "avg_processing_seconds": self._proc_sum / done if done else 0.0,
+                "max_processing_seconds": self._proc_max,
+            }
+
+    def _run(self) -> None:
+        while True:
+            enqueued, item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            started = time.perf_counter()
+            ok = True
+            try:
+                self.handler(item)
+            except Exception as exc:
+                ok = False
+                logger.error("Order pipeline handler failed: %s", exc)
+                if self.on_error is not None:
+                    self.on_error(item, exc)
+            finished = time.perf_counter()
+            with self._lock:
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+                self._wait_sum += started - enqueued
+                elapsed = finished - started
+                self._proc_sum += elapsed
+                self._proc_max = max(self._proc_max, elapsed)
+            self._queue.task_done()
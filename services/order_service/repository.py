@@ -0,0 +1,92 @@
+"""In-memory order repository with id, product and id-range indexes."""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+
+class Order(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+
+
+class DuplicateOrderError(KeyError):
+    """Raised when an order id is already present in the repository."""
+
+
+class OrderRepository:
+    """Thread-safe order store.
+
+    Orders are hashed by id, grouped by ``product_id`` and their ids are kept
+    in a sorted list so range queries bisect instead of scanning. The handlers
+    are async, but the order pipeline's worker threads and code run through
+    ``asyncio.to_thread`` can reach it too, so every mutation holds the lock.
+    """
+
+    def __init__(self, orders: Optional[Iterable[Order]] = None) -> None:
+        self._lock = threading.RLock()
+        self._by_id: Dict[int, Order] = {}
+        self._by_product: Dict[int, List[int]] = {}
+        self._sorted_ids: List[int] = []
+        for order in orders or ():
+            self.add(order)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, order_id: object) -> bool:
+        return order_id in self._by_id
+
+    def get(self, order_id: int) -> Optional[Order]:
+        return self._by_id.get(order_id)
+
+    def add(self, order: Order) -> Order:
+        with self._lock:
+            if order.id in self._by_id:
+                raise DuplicateOrderError(order.id)
+            self._by_id[order.id] = order
+            _insert_sorted(self._sorted_ids, order.id)
+            _insert_sorted(self._by_product.setdefault(
+                order.product_id, []), order.id)
+        return order
+
+    def by_product(self, product_id: int) -> List[Order]:
+        with self._lock:
+            return [self._by_id[i] for i in self._by_product.get(product_id, ())]
+
+    def id_range(self, start: Optional[int] = None, end: Optional[int] = None,
+                 limit: Optional[int] = None) -> List[Order]:
+        """Return orders with ``start <= id <= end`` in ascending id order."""
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(
+                self._sorted_ids, start)
+            hi = len(self._sorted_ids) if end is None else bisect.bisect_right(
+                self._sorted_ids, end)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self._by_id[i] for i in self._sorted_ids[lo:hi]]
+
+    def iter_pages(self, start: Optional[int] = None, end: Optional[int] = None,
+                   batch_size: int = 500) -> Iterator[List[Order]]:
+        """Yield successive id-ordered pages, holding the lock only per page."""
+        while True:
+            batch = self.id_range(start, end, batch_size)
+            if not batch:
+                return
+            yield batch
+            start = batch[-1].id + 1
+
+    def all(self) -> List[Order]:
+        return self.id_range()
+
+
+def _insert_sorted(ids: List[int], value: int) -> None:
+    # Ids usually arrive in increasing order, so try the cheap append first.
+    if not ids or ids[-1] < value:
+        ids.append(value)
+    else:
+        bisect.insort(ids, value)
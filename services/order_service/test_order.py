@@ -1,5 +1,13 @@
+import json
+import threading
+import time
+
 from fastapi.testclient import TestClient
+import services.order_service.app as order_app
 from services.order_service.app import app
+from services.order_service.idempotency import SeenIdCache
+from services.order_service.pipeline import OrderPipeline
+from services.order_service.repository import Order, OrderRepository
 
 
 client = TestClient(app)
@@ -15,3 +23,179 @@ def test_list_orders():
     r = client.get("/orders")
     assert r.status_code == 200
     assert isinstance(r.json(), list)
+
+
+def test_create_and_get_order():
+    r = client.post("/orders", json={"id": 201, "product_id": 7, "quantity": 1})
+    assert r.status_code == 201
+    r = client.get("/orders/201")
+    assert r.status_code == 200
+    assert r.json()["product_id"] == 7
+
+
+def test_create_duplicate_order_rejected():
+    r = client.post("/orders", json={"id": 1, "product_id": 1, "quantity": 1})
+    assert r.status_code == 400
+
+
+def test_list_orders_for_product():
+    client.post("/orders", json={"id": 202, "product_id": 8, "quantity": 3})
+    client.post("/orders", json={"id": 203, "product_id": 8, "quantity": 1})
+    r = client.get("/products/8/orders")
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()] == [202, 203]
+
+
+def test_list_orders_id_range():
+    repo = OrderRepository([Order(id=i, product_id=1, quantity=1)
+                            for i in (5, 1, 9, 3)])
+    assert [o.id for o in repo.id_range(3, 5)] == [3, 5]
+    assert [o.id for o in repo.id_range(start=4)] == [5, 9]
+    assert [o.id for o in repo.id_range(limit=2)] == [1, 3]
+
+
+def test_list_orders_cursor_pagination_and_stream():
+    for i in range(401, 404):
+        client.post("/orders", json={"id": i, "product_id": 9, "quantity": 1})
+    r = client.get("/orders", params={"cursor": 400, "limit": 2})
+    assert [o["id"] for o in r.json()] == [401, 402]
+    assert r.headers["X-Next-Cursor"] == "402"
+    r = client.get("/orders", params={"cursor": 402, "stream": "true"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [403]
+
+
+def test_subscribe_defaults_to_the_per_message_route():
+    r = client.get("/dapr/subscribe")
+    sub = r.json()[0]
+    assert sub["route"] == "/orders-handler"
+    assert "bulkSubscribe" not in sub
+
+
+def test_subscribe_declares_bulk_subscription(monkeypatch):
+    monkeypatch.setattr(order_app, "BULK_SUBSCRIBE_ENABLED", True)
+    r = client.get("/dapr/subscribe")
+    sub = r.json()[0]
+    assert sub["route"] == "/orders-handler/bulk"
+    assert sub["bulkSubscribe"]["enabled"] is True
+    assert sub["bulkSubscribe"]["maxMessagesCount"] > 0
+
+
+def test_bulk_handler_returns_status_per_entry():
+    payload = {
+        "entries": [
+            {"entryId": "a", "event": {"data": {"id": 1}},
+             "contentType": "application/cloudevents+json"},
+            {"entryId": "b", "event": {"data": {"id": 2}},
+             "contentType": "application/cloudevents+json"},
+        ],
+        "topic": "orders",
+        "pubsubname": "pubsub",
+    }
+    r = client.post("/orders-handler/bulk", json=payload)
+    assert r.status_code == 200
+    assert r.json() == {"statuses": [{"entryId": "a", "status": "SUCCESS"},
+                                     {"entryId": "b", "status": "SUCCESS"}]}
+
+
+def test_orders_handler_skips_redelivered_event():
+    event = {"id": "evt-dup-1", "data": {"id": 501}}
+    first = client.post("/orders-handler", json=event).json()
+    second = client.post("/orders-handler", json=event).json()
+    assert first == {"status": "SUCCESS", "message": "Order received via Dapr"}
+    assert second == {"status": "SUCCESS", "message": "Order already processed"}
+    stats = client.get("/idempotency/stats").json()
+    assert stats["hits"] >= 1
+
+
+def test_seen_id_cache_ttl_and_size_eviction():
+    now = [0.0]
+    cache = SeenIdCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+    assert cache.check_and_add("a") is False
+    assert cache.check_and_add("a") is True
+    cache.check_and_add("b")
+    cache.check_and_add("c")
+    assert "a" not in cache and len(cache) == 2
+    now[0] = 11.0
+    assert cache.check_and_add("b") is False
+    assert cache.stats()["hits"] == 1
+
+
+def test_seen_id_cache_persists_to_sqlite(tmp_path):
+    db = str(tmp_path / "seen.db")
+    SeenIdCache(db_path=db).check_and_add("evt-1")
+    assert SeenIdCache(db_path=db).check_and_add("evt-1") is True
+
+
+def test_handlers_dedupe_with_sqlite_backed_cache(tmp_path, monkeypatch):
+    cache = SeenIdCache(db_path=str(tmp_path / "seen.db"))
+    monkeypatch.setattr(order_app, "_seen", cache)
+    assert cache.persistent
+    event = {"id": "evt-db-1", "data": {"id": 701}}
+    assert client.post("/orders-handler", json=event).json()["message"] == \
+        "Order received via Dapr"
+    assert client.post("/orders-handler", json=event).json()["message"] == \
+        "Order already processed"
+    bulk = {"entries": [{"entryId": "x", "event": event}]}
+    r = client.post("/orders-handler/bulk", json=bulk)
+    assert r.json() == {"statuses": [{"entryId": "x", "status": "SUCCESS"}]}
+    assert cache.hits == 2
+
+
+def test_orders_handler_asks_for_retry_on_error(monkeypatch):
+    def broken(event):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(order_app, "_accept_order_event", broken)
+    r = client.post("/orders-handler", json={"id": "evt-err-1", "data": {}})
+    assert r.json() == {"status": "RETRY", "message": "boom"}
+
+
+def test_orders_handler_queues_work_for_pipeline():
+    r = client.post("/orders-handler", json={"id": "evt-q-1", "data": {"id": 601}})
+    assert r.json()["status"] == "SUCCESS"
+    stats = client.get("/pipeline/stats").json()
+    assert stats["submitted"] >= 1
+    assert stats["queue_capacity"] > 0
+
+
+def test_pipeline_rejects_when_full_and_drains_on_shutdown():
+    gate = threading.Event()
+    done = []
+
+    def handler(item):
+        gate.wait(5)
+        done.append(item)
+
+    pipeline = OrderPipeline(handler, workers=1, max_queue=1)
+    assert pipeline.submit(1) is True
+    deadline = time.monotonic() + 5
+    while pipeline.depth and time.monotonic() < deadline:
+        time.sleep(0.01)  # let the worker pick up item 1
+    assert pipeline.submit(2) is True
+    assert pipeline.submit(3) is False
+    gate.set()
+    assert pipeline.shutdown(timeout=5) is True
+    assert done == [1, 2]
+    assert pipeline.stats()["rejected"] == 1
+
+
+def test_pipeline_reports_handler_errors():
+    errors = []
+
+    def handler(item):
+        raise ValueError("boom")
+
+    pipeline = OrderPipeline(handler, workers=1,
+                             on_error=lambda item, exc: errors.append(item))
+    pipeline.submit("x")
+    pipeline.shutdown(timeout=5)
+    assert errors == ["x"]
+    assert pipeline.stats()["failed"] == 1
+
+
+def test_metrics_endpoint_exposes_pipeline_and_idempotency():
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert "order_pipeline_queue_depth" in r.text
+    assert "idempotency_cache_hits_total" in r.text
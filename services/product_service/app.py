@@ -1,89 +1,157 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-import logging
-import httpx
-from tenacity import retry, wait_exponential, stop_after_attempt
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import time
+from typing import Iterable, Iterator, List, Optional
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+try:
+    from ..common.metrics import CONTENT_TYPE, PrometheusMiddleware, Registry
+    from ..common.structured_logging import configure_logging, summarize
+    from .catalog import DuplicateProductError, Product, ProductCatalog
+    from .publisher import BulkPublisher, DaprPublisher
+except ImportError:  # running as a flat module inside the container image
+    from metrics import CONTENT_TYPE, PrometheusMiddleware, Registry
+    from structured_logging import configure_logging, summarize
+    from catalog import DuplicateProductError, Product, ProductCatalog
+    from publisher import BulkPublisher, DaprPublisher
 
-app = FastAPI(title="ProductService")
+logger = configure_logging(__name__)
 
+metrics = Registry()
+publish_latency = metrics.histogram(
+    "dapr_publish_duration_seconds",
+    "Time to publish to the Dapr sidecar, including retries.",
+    ("mode", "outcome"))
+publish_retries = metrics.counter(
+    "dapr_publish_retries_total", "Dapr publish attempts that were retried.")
 
-class Product(BaseModel):
-    id: int
-    name: str
-    price: float
+publisher = DaprPublisher(on_retry=lambda state: publish_retries.inc())
+bulk_publisher = BulkPublisher(publisher)
 
 
-_products = [Product(id=1, name="Widget", price=9.99)]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await publisher.start()
+    yield
+    await bulk_publisher.aclose()
+    await publisher.aclose()
+
+
+app = FastAPI(title="ProductService", lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware, registry=metrics)
+
+
+_catalog = ProductCatalog([Product(id=1, name="Widget", price=9.99)])
+
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def _ndjson(pages: Iterable[List[Product]]) -> Iterator[str]:
+    for batch in pages:
+        yield "".join(p.model_dump_json() + "\n" for p in batch)
 
 
 @app.get("/health")
-def health():
+async def health():
     logger.info("API: GET /health - Input: None")
     result = {"status": "ok"}
-    logger.info(f"API: GET /health - Output: {result}")
+    logger.info("API: GET /health - Output: %s", result)
     return result
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/products", response_model=List[Product])
-def list_products():
-    logger.info("API: GET /products - Input: None")
-    result = _products
+async def list_products(response: Response,
+                        name: Optional[str] = None,
+                        cursor: Optional[int] = None,
+                        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        stream: bool = False):
     logger.info(
-        f"API: GET /products - Output: {[product.dict() for product in result]}")
+        "API: GET /products - Input: name=%s, cursor=%s, limit=%s, stream=%s",
+        name, cursor, limit, stream)
+    if stream and name is None and limit is None:
+        logger.info("API: GET /products - Output: streaming NDJSON")
+        return StreamingResponse(
+            _ndjson(_catalog.iter_pages(cursor, STREAM_BATCH_SIZE)),
+            media_type="application/x-ndjson")
+    if name is not None:
+        result = [p for p in _catalog.find_by_name(name)
+                  if cursor is None or p.id > cursor][:limit]
+    else:
+        result = _catalog.page(cursor, limit)
+    if stream:
+        response = StreamingResponse(_ndjson([result]),
+                                     media_type="application/x-ndjson")
+    if limit is not None and len(result) == limit:
+        response.headers["X-Next-Cursor"] = str(result[-1].id)
+    if stream:
+        return response
+    logger.info("API: GET /products - Output: %s", summarize(result))
     return result
 
 
 @app.get("/products/{product_id}", response_model=Product)
-def get_product(product_id: int):
-    logger.info(
-        f"API: GET /products/{product_id} - Input: product_id={product_id}")
-    for p in _products:
-        if p.id == product_id:
-            logger.info(
-                f"API: GET /products/{product_id} - Output: {p.dict()}")
-            return p
-    logger.error(f"API: GET /products/{product_id} - Error: Product not found")
+async def get_product(product_id: int):
+    logger.info("API: GET /products/%s - Input: product_id=%s",
+                product_id, product_id)
+    p = _catalog.get(product_id)
+    if p is not None:
+        logger.info("API: GET /products/%s - Output: %s",
+                    product_id, summarize(p))
+        return p
+    logger.error("API: GET /products/%s - Error: Product not found", product_id)
     raise HTTPException(status_code=404, detail="Product not found")
 
 
 @app.post("/products", response_model=Product, status_code=201)
-def create_product(p: Product):
-    logger.info(f"API: POST /products - Input: {p.dict()}")
-    # naive uniqueness by id
-    for existing in _products:
-        if existing.id == p.id:
-            logger.error(
-                f"API: POST /products - Error: ID {p.id} already exists")
-            raise HTTPException(status_code=400, detail="ID already exists")
-    _products.append(p)
-    logger.info(f"API: POST /products - Output: {p.dict()}")
+async def create_product(p: Product):
+    logger.info("API: POST /products - Input: %s", summarize(p))
+    try:
+        _catalog.add(p)
+    except DuplicateProductError:
+        logger.error("API: POST /products - Error: ID %s already exists", p.id)
+        raise HTTPException(status_code=400, detail="ID already exists")
+    logger.info("API: POST /products - Output: %s", summarize(p))
     return p
 
 
 @app.post("/publish-order")
-def publish_order(order_data: dict):
-    logger.info(f"API: POST /publish-order - Input: {order_data}")
-    dapr_url = "http://localhost:3500/v1.0/publish/pubsub/orders"
-
-    @retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def _publish(payload: dict):
-        with httpx.Client(timeout=5) as client:
-            resp = client.post(dapr_url, json=payload)
-            resp.raise_for_status()
-            return resp
-
+async def publish_order(order_data: dict):
+    logger.info("API: POST /publish-order - Input: %s", summarize(order_data))
+    start = time.perf_counter()
     try:
-        resp = _publish(order_data)
-        logger.info(f"Published to Dapr: {resp.status_code}")
+        resp = await publisher.publish("orders", order_data)
+        publish_latency.observe(time.perf_counter() - start, ("single", "ok"))
+        logger.info("Published to Dapr: %s", resp.status_code)
         result = {"status": "published", "data": order_data}
-        logger.info(f"API: POST /publish-order - Output: {result}")
+        logger.info("API: POST /publish-order - Output: %s", summarize(result))
         return result
     except Exception as e:
-        logger.error(f"API: POST /publish-order - Error: {str(e)}")
+        publish_latency.observe(time.perf_counter() - start, ("single", "error"))
+        logger.error("API: POST /publish-order - Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/publish-orders/bulk")
+async def publish_orders_bulk(orders: List[dict]):
+    logger.info("API: POST /publish-orders/bulk - Input: %s orders", len(orders))
+    start = time.perf_counter()
+    errors = await bulk_publisher.publish_many("orders", orders)
+    publish_latency.observe(time.perf_counter() - start,
+                            ("bulk", "error" if any(errors) else "ok"))
+    statuses = [
+        {"index": i, "status": "published"} if error is None
+        else {"index": i, "status": "failed", "error": error}
+        for i, error in enumerate(errors)
+    ]
+    failed = sum(1 for s in statuses if s["status"] == "failed")
+    result = {"published": len(orders) - failed, "failed": failed,
+              "statuses": statuses}
+    logger.info("API: POST /publish-orders/bulk - Output: published=%s, failed=%s",
+                result["published"], failed)
+    return result
@@ -0,0 +1,96 @@
+"""In-memory product catalog with O(1) id lookups and a secondary name index."""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from pydantic import BaseModel
+
+
+class Product(BaseModel):
+    id: int
+    name: str
+    price: float
+
+
+class DuplicateProductError(KeyError):
+    """Raised when a product id is already present in the catalog."""
+
+
+class ProductCatalog:
+    """Thread-safe product store keyed by id with a name -> ids index.
+
+    Single-key reads go straight to the dicts (atomic under the GIL); every
+    mutation takes the lock so the primary and secondary indexes never drift.
+    Ids are also kept sorted so pages can be served by keyset (``after`` id).
+    """
+
+    def __init__(self, products: Optional[Iterable[Product]] = None) -> None:
+        self._lock = threading.RLock()
+        self._by_id: Dict[int, Product] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._sorted_ids: List[int] = []
+        for product in products or ():
+            self.add(product)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, product_id: object) -> bool:
+        return product_id in self._by_id
+
+    def get(self, product_id: int) -> Optional[Product]:
+        return self._by_id.get(product_id)
+
+    def add(self, product: Product) -> Product:
+        with self._lock:
+            if product.id in self._by_id:
+                raise DuplicateProductError(product.id)
+            self._by_id[product.id] = product
+            self._by_name.setdefault(product.name, set()).add(product.id)
+            if not self._sorted_ids or self._sorted_ids[-1] < product.id:
+                self._sorted_ids.append(product.id)
+            else:
+                bisect.insort(self._sorted_ids, product.id)
+        return product
+
+    def remove(self, product_id: int) -> Optional[Product]:
+        with self._lock:
+            product = self._by_id.pop(product_id, None)
+            if product is not None:
+                pos = bisect.bisect_left(self._sorted_ids, product_id)
+                del self._sorted_ids[pos]
+                ids = self._by_name.get(product.name)
+                if ids is not None:
+                    ids.discard(product_id)
+                    if not ids:
+                        del self._by_name[product.name]
+        return product
+
+    def find_by_name(self, name: str) -> List[Product]:
+        with self._lock:
+            ids = sorted(self._by_name.get(name, ()))
+            return [self._by_id[i] for i in ids]
+
+    def page(self, after: Optional[int] = None,
+             limit: Optional[int] = None) -> List[Product]:
+        """Return up to ``limit`` products with id > ``after`` in id order."""
+        with self._lock:
+            lo = 0 if after is None else bisect.bisect_right(
+                self._sorted_ids, after)
+            hi = len(self._sorted_ids) if limit is None else lo + limit
+            return [self._by_id[i] for i in self._sorted_ids[lo:hi]]
+
+    def iter_pages(self, after: Optional[int] = None,
+                   batch_size: int = 500) -> Iterator[List[Product]]:
+        """Yield successive pages, holding the lock only while slicing."""
+        while True:
+            batch = self.page(after, batch_size)
+            if not batch:
+                return
+            yield batch
+            after = batch[-1].id
+
+    def all(self) -> List[Product]:
+        return self.page()
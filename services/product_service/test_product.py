@@ -1,5 +1,14 @@
+import asyncio
+import json
+
+import httpx
+import pytest
 from fastapi.testclient import TestClient
+from tenacity import wait_none
+from services.product_service import app as product_app
 from services.product_service.app import app
+from services.product_service.catalog import Product, ProductCatalog
+from services.product_service.publisher import BulkPublisher, DaprPublisher
 
 
 client = TestClient(app)
@@ -15,3 +24,147 @@ def test_list_products():
     r = client.get("/products")
     assert r.status_code == 200
     assert isinstance(r.json(), list)
+
+
+def test_create_and_get_product():
+    r = client.post("/products", json={"id": 101, "name": "Gadget", "price": 4.5})
+    assert r.status_code == 201
+    r = client.get("/products/101")
+    assert r.status_code == 200
+    assert r.json()["name"] == "Gadget"
+
+
+def test_create_duplicate_product_rejected():
+    r = client.post("/products", json={"id": 1, "name": "Dup", "price": 1.0})
+    assert r.status_code == 400
+
+
+def test_get_missing_product_returns_404():
+    r = client.get("/products/999999")
+    assert r.status_code == 404
+
+
+def test_list_products_filtered_by_name():
+    client.post("/products", json={"id": 102, "name": "Sprocket", "price": 2.0})
+    r = client.get("/products", params={"name": "Sprocket"})
+    assert r.status_code == 200
+    assert [p["id"] for p in r.json()] == [102]
+
+
+def test_catalog_remove_updates_name_index():
+    catalog = ProductCatalog([Product(id=1, name="A", price=1.0),
+                              Product(id=2, name="A", price=2.0)])
+    assert [p.id for p in catalog.find_by_name("A")] == [1, 2]
+    catalog.remove(1)
+    assert 1 not in catalog
+    assert [p.id for p in catalog.find_by_name("A")] == [2]
+
+
+def test_list_products_cursor_pagination():
+    for i in range(301, 306):
+        client.post("/products", json={"id": i, "name": "Page", "price": 1.0})
+    r = client.get("/products", params={"cursor": 300, "limit": 2})
+    assert [p["id"] for p in r.json()] == [301, 302]
+    assert r.headers["X-Next-Cursor"] == "302"
+    r = client.get("/products", params={"cursor": 302, "limit": 2})
+    assert [p["id"] for p in r.json()] == [303, 304]
+
+
+def test_list_products_ndjson_stream():
+    r = client.get("/products", params={"stream": "true"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert rows[0] == {"id": 1, "name": "Widget", "price": 9.99}
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def _publisher(handler, **kwargs):
+    return DaprPublisher("http://dapr", transport=httpx.MockTransport(handler),
+                         wait=wait_none(), **kwargs)
+
+
+def test_publisher_posts_to_dapr_topic():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(204)
+
+    async def run():
+        pub = _publisher(handler)
+        resp = await pub.publish("orders", {"id": 1})
+        await pub.aclose()
+        return resp
+
+    assert asyncio.run(run()).status_code == 204
+    assert seen == [("/v1.0/publish/pubsub/orders", {"id": 1})]
+
+
+def test_publisher_retries_then_raises():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        pub = _publisher(handler, max_attempts=3)
+        try:
+            await pub.publish("orders", {"id": 1})
+        finally:
+            await pub.aclose()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert len(calls) == 3
+
+
+def test_bulk_publisher_coalesces_by_size_and_reports_failures():
+    batches = []
+
+    def handler(request):
+        entries = json.loads(request.content)
+        batches.append([e["event"]["id"] for e in entries])
+        failed = [{"entryId": e["entryId"], "error": "boom"}
+                  for e in entries if e["event"]["id"] == 3]
+        if failed:
+            return httpx.Response(500, json={"failedEntries": failed})
+        return httpx.Response(204)
+
+    async def run():
+        pub = _publisher(handler)
+        bulk = BulkPublisher(pub, max_batch=2, linger_ms=5)
+        errors = await bulk.publish_many("orders", [{"id": i} for i in range(5)])
+        await bulk.aclose()
+        await pub.aclose()
+        return errors
+
+    errors = asyncio.run(run())
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert errors == [None, None, None, "boom", None]
+
+
+def test_publish_orders_bulk_endpoint(monkeypatch):
+    def handler(request):
+        assert request.url.path == "/v1.0-alpha1/publish/bulk/pubsub/orders"
+        return httpx.Response(204)
+
+    monkeypatch.setattr(product_app.bulk_publisher, "publisher",
+                        _publisher(handler))
+    with TestClient(app) as c:
+        r = c.post("/publish-orders/bulk", json=[{"id": 1}, {"id": 2}])
+    assert r.status_code == 200
+    body = r.json()
+    assert body["published"] == 2 and body["failed"] == 0
+    assert [s["status"] for s in body["statuses"]] == ["published"] * 2
+
+
+def test_metrics_endpoint_reports_route_latency():
+    client.get("/products/1")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert ('http_requests_total{method="GET",route="/products/{product_id}",'
+            'status="200"}') in r.text
+    assert "http_request_duration_seconds_bucket" in r.text
@@ -0,0 +1,166 @@
+"""Batch insight generation over many context files with adaptive throttling."""
+from __future__ import annotations
+
+import glob
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, TextIO
+
+from .client import aws_errors
+
+CONTEXT_SUFFIXES = (".md", ".txt", ".markdown", ".log")
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException",
+                  "ServiceUnavailableException"}
+# Prefixes iter_insights uses to report a model's error or timeout as text.
+FAILURE_MARKERS = ("[Error calling ", "[Timeout calling ")
+
+
+def expand_context_paths(spec: str) -> List[Path]:
+    """Resolve a directory, a glob pattern or a single file into context files."""
+    path = Path(spec)
+    if path.is_dir():
+        matches = [p for p in path.rglob("*") if p.suffix.lower() in CONTEXT_SUFFIXES]
+    else:
+        matches = [Path(p) for p in glob.glob(spec, recursive=True)]
+    return sorted(p for p in matches if p.is_file())
+
+
+class AdaptiveRateLimiter:
+    """Shared pacing between Bedrock calls, adjusted AIMD-style.
+
+    Every throttle doubles the minimum interval between calls (up to
+    ``max_interval``); every success shrinks it by ``decay``. All workers go
+    through one limiter, so a throttle slows the whole batch, not one thread.
+    """
+
+    def __init__(self, *, initial_interval: float = 0.0, min_step: float = 0.05,
+                 max_interval: float = 10.0, decay: float = 0.9,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.interval = initial_interval
+        self.min_step = min_step
+        self.max_interval = max_interval
+        self.decay = decay
+        self.throttles = 0
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.interval *= self.decay
+            if self.interval < self.min_step / 10:
+                self.interval = 0.0
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+            self.interval = min(self.max_interval,
+                                max(self.min_step, self.interval * 2))
+
+
+class ThrottledClient:
+    """Wrap a bedrock-runtime client with pacing and throttle retries."""
+
+    def __init__(self, client, limiter: AdaptiveRateLimiter, *,
+                 max_attempts: int = 6, base_backoff: float = 0.5) -> None:
+        self._client = client
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+
+    def _call(self, method: str, **kwargs: Any):
+        for attempt in range(1, self.max_attempts + 1):
+            self.limiter.acquire()
+            try:
+                result = getattr(self._client, method)(**kwargs)
+            except aws_errors() as exc:
+                code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+                if code not in THROTTLE_CODES or attempt == self.max_attempts:
+                    raise
+                self.limiter.on_throttle()
+                backoff = self.base_backoff * (2 ** (attempt - 1))
+                self.limiter.sleep(random.uniform(0, backoff))
+                continue
+            self.limiter.on_success()
+            return result
+
+    def invoke_model(self, **kwargs: Any):
+        return self._call("invoke_model", **kwargs)
+
+    def invoke_model_with_response_stream(self, **kwargs: Any):
+        return self._call("invoke_model_with_response_stream", **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+def run_batch(
+    paths: Iterable[Path],
+    generate: Callable[[str], Dict[str, str]],
+    out: TextIO,
+    *,
+    workers: int = 4,
+    load: Callable[[Path], str] = lambda p: p.read_text(),
+) -> Dict[str, Any]:
+    """Run ``generate`` for each context file on a bounded pool.
+
+    Each result is written to ``out`` as one JSON line the moment it
+    finishes, with its own timing; a final ``summary`` line carries the
+    aggregate timing. A file counts as failed if ``generate`` raised or any
+    model answered with an error or timeout marker. Returns the summary.
+    """
+    paths = list(paths)
+    item_seconds: List[float] = []
+    failures = 0
+
+    def one(path: Path) -> Dict[str, Any]:
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"context_file": str(path)}
+        try:
+            results = generate(load(path))
+            record.update({k: v for k, v in results.items() if k != "prompt"})
+            failed = sorted(k for k, v in results.items()
+                            if isinstance(v, str) and v.startswith(FAILURE_MARKERS))
+            if failed:
+                record["failed_models"] = failed
+        except Exception as exc:  # report and keep the batch going
+            record["error"] = f"{type(exc).__name__}: {exc}"
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="insights-batch") as pool:
+        futures = [pool.submit(one, path) for path in paths]
+        for future in as_completed(futures):
+            record = future.result()
+            item_seconds.append(record["elapsed_seconds"])
+            failures += "error" in record or "failed_models" in record
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    wall = time.perf_counter() - started
+    summary = {
+        "files": len(paths),
+        "failed": failures,
+        "workers": workers,
+        "wall_seconds": round(wall, 3),
+        "sum_item_seconds": round(sum(item_seconds), 3),
+        "max_item_seconds": max(item_seconds, default=0.0),
+        "files_per_second": round(len(paths) / wall, 3) if wall else 0.0,
+    }
+    out.write(json.dumps({"summary": summary}) + "\n")
+    out.flush()
+    return summary
@@ -0,0 +1,130 @@
+"""Content-addressed on-disk cache for Bedrock ``invoke_model`` responses."""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "BEDROCK_CACHE_DIR",
+    str(Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "bedrock_insights"),
+)
+DEFAULT_CACHE_TTL = float(os.getenv("BEDROCK_CACHE_TTL", str(24 * 3600)))
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv("BEDROCK_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+def cache_key(model_id: str, body: Union[str, bytes]) -> str:
+    """Hash the model id and the full request body (prompt + generation config)."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Directory of ``<sha256>.json`` entries with TTL expiry and LRU eviction.
+
+    Entries record when they were created (for the TTL); a hit touches the
+    file's mtime, and when the directory grows past ``max_bytes`` the least
+    recently used files are deleted first.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = DEFAULT_CACHE_TTL,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        refresh: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        entry = None
+        if not self.refresh:
+            try:
+                entry = json.loads(path.read_text())
+            except (OSError, ValueError):
+                entry = None
+        if entry is not None and time.time() - entry.get("created", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another worker since the read; the hit stands
+        return entry["body"].encode("utf-8")
+
+    def put(self, key: str, model_id: str, body: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {"created": time.time(), "model_id": model_id,
+                 "body": body.decode("utf-8")}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(entry, handle)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CachingClient:
+    """Wrap a ``bedrock-runtime`` client so ``invoke_model`` consults the cache."""
+
+    def __init__(self, client, cache: ResponseCache) -> None:
+        self._client = client
+        self.cache = cache
+
+    def invoke_model(self, *, modelId: str, body: Union[str, bytes], **kwargs: Any):
+        key = cache_key(modelId, body)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {"body": io.BytesIO(cached), "cached": True}
+        response = self._client.invoke_model(modelId=modelId, body=body, **kwargs)
+        raw = response["body"].read()
+        self.cache.put(key, modelId, raw)
+        return {**response, "body": io.BytesIO(raw)}
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
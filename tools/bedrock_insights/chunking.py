@@ -0,0 +1,103 @@
+"""Token-budgeted context chunking and parallel map-reduce summarization."""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+# Rough chars-per-token ratio for English prose and logs on Claude/Titan
+# tokenizers; good enough for budgeting, not for billing.
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTEXT_TOKEN_BUDGET = int(os.getenv("BEDROCK_CONTEXT_TOKEN_BUDGET", "6000"))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def iter_chunks(lines: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """Group ``lines`` into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks break on line boundaries; a single line longer than the budget is
+    split on character boundaries. Only one chunk is held in memory at a time.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    buffer: List[str] = []
+    size = 0
+    for line in lines:
+        while len(line) > max_chars:
+            if buffer:
+                yield "".join(buffer)
+                buffer, size = [], 0
+            yield line[:max_chars]
+            line = line[max_chars:]
+        if size + len(line) > max_chars and buffer:
+            yield "".join(buffer)
+            buffer, size = [], 0
+        buffer.append(line)
+        size += len(line)
+    if buffer:
+        yield "".join(buffer)
+
+
+def read_chunks(path: Union[str, Path], max_tokens: int) -> Iterator[str]:
+    """Stream ``path`` line by line into token-budgeted chunks."""
+    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+        yield from iter_chunks(handle, max_tokens)
+
+
+def _map_chunks(chunks: Iterable[str], summarize: Callable[[str], str],
+                workers: int) -> str:
+    """The single chunk unchanged, else the joined summaries of every chunk."""
+    iterator = iter(chunks)
+    first = next(iterator, "")
+    second = next(iterator, None)
+    if second is None:
+        return first
+
+    def all_chunks() -> Iterator[str]:
+        yield first
+        yield second
+        yield from iterator
+
+    summaries: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers),
+                            thread_name_prefix="context-map") as pool:
+        window = []
+        for chunk in all_chunks():
+            window.append(pool.submit(summarize, chunk))
+            if len(window) >= 2 * max(1, workers):
+                summaries.append(window.pop(0).result())
+        summaries.extend(future.result() for future in window)
+    return "\n\n".join(
+        f"[Part {i} of {len(summaries)}]\n{summary.strip()}"
+        for i, summary in enumerate(summaries, 1)
+    )
+
+
+def map_reduce_context(
+    chunks: Iterable[str],
+    summarize: Callable[[str], str],
+    *,
+    workers: int = 4,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """Return the context unchanged if it is one chunk, else joined chunk summaries.
+
+    The map step runs ``summarize`` over chunks on a bounded pool (at most
+    ``2 * workers`` chunks are read ahead); the caller's normal insight call
+    over the joined summaries is the reduce step. With ``max_tokens``, joined
+    summaries that are still over budget are chunked and summarized again
+    until they fit in one chunk.
+    """
+    context = _map_chunks(chunks, summarize, workers)
+    while max_tokens is not None and estimate_tokens(context) > max_tokens:
+        reduced = _map_chunks(iter_chunks(context.splitlines(keepends=True), max_tokens),
+                              summarize, workers)
+        if len(reduced) >= len(context):
+            raise ValueError(
+                f"chunk summaries do not shrink below {max_tokens} tokens; "
+                "raise the context budget")
+        context = reduced
+    return context
@@ -0,0 +1,100 @@
+"""Process-wide, pooled ``bedrock-runtime`` clients.
+
+Building a boto3 client loads the service model, endpoint rules and the
+credential chain, which costs tens of milliseconds. Clients are thread-safe,
+so one client per region and configuration is built on first use and shared
+by every later call, keeping its urllib3 connection pool (and warm TLS
+connections) alive across calls.
+
+boto3 and botocore are imported on first use only, so offline runs,
+``--help`` and tests never pay for loading the SDK.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from botocore.config import Config
+
+DEFAULT_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "32"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "120"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "4"))
+DEFAULT_RETRY_MODE = os.getenv("BEDROCK_RETRY_MODE", "adaptive")
+
+_clients: Dict[Tuple[Any, ...], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def client_config(
+    *,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    retry_mode: str = DEFAULT_RETRY_MODE,
+) -> "Config":
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={"max_attempts": max_attempts, "mode": retry_mode},
+        tcp_keepalive=True,
+    )
+
+
+def get_bedrock_client(
+    region: str,
+    *,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    retry_mode: str = DEFAULT_RETRY_MODE,
+):
+    """Return the shared ``bedrock-runtime`` client for this region and config."""
+    key = (region, max_pool_connections, connect_timeout, read_timeout,
+           max_attempts, retry_mode)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import boto3
+
+            # A private session: boto3's default session is not thread-safe.
+            session = boto3.session.Session()
+            client = _clients[key] = session.client(
+                "bedrock-runtime",
+                region_name=region,
+                config=client_config(
+                    max_pool_connections=max_pool_connections,
+                    connect_timeout=connect_timeout,
+                    read_timeout=read_timeout,
+                    max_attempts=max_attempts,
+                    retry_mode=retry_mode,
+                ),
+            )
+        return client
+
+
+def aws_errors() -> Tuple[type, ...]:
+    """The botocore error types, for ``except aws_errors():`` clauses.
+
+    An ``except`` expression is only evaluated once an exception is raised,
+    so botocore is not imported on paths that never fail a call.
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    return BotoCoreError, ClientError
+
+
+def clear_client_cache() -> None:
+    """Drop the shared clients, e.g. after credentials or env config change."""
+    with _clients_lock:
+        _clients.clear()
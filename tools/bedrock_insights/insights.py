@@ -2,21 +2,31 @@
 
 This module exposes a small CLI that assembles project context, creates a
 single, structured prompt, and then queries two Bedrock models to return
-recommendations. It can run in "offline" mode for local testing without
-making AWS calls.
+recommendations. The models are invoked concurrently, each with its own
+timeout, so a run takes roughly as long as the slowest model. It can run in
+"offline" mode for local testing without making AWS calls.
 """
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import os
+import queue
+import sys
 import textwrap
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-import boto3
-from botocore.exceptions import BotoCoreError, ClientError
+from .batch import AdaptiveRateLimiter, ThrottledClient, expand_context_paths, run_batch
+from .cache import DEFAULT_CACHE_DIR, CachingClient, ResponseCache
+from .chunking import (DEFAULT_CONTEXT_TOKEN_BUDGET, iter_chunks, map_reduce_context,
+                       read_chunks)
+from .client import (DEFAULT_MAX_POOL_CONNECTIONS, DEFAULT_READ_TIMEOUT, aws_errors,
+                     get_bedrock_client)
 
 BEDROCK_REGION = os.getenv("BEDROCK_REGION", "us-east-1")
 DEFAULT_CLAUDE_MODEL = os.getenv(
@@ -25,6 +35,9 @@ DEFAULT_CLAUDE_MODEL = os.getenv(
 DEFAULT_TITAN_MODEL = os.getenv(
     "BEDROCK_TITAN_MODEL_ID", "amazon.titan-text-premier-v1:0"
 )
+DEFAULT_MODEL_TIMEOUT = float(os.getenv("BEDROCK_MODEL_TIMEOUT", "120"))
+DEFAULT_MAX_TOKENS = int(os.getenv("BEDROCK_MAX_TOKENS", "800"))
+CHUNK_SUMMARY_MAX_TOKENS = int(os.getenv("BEDROCK_CHUNK_SUMMARY_MAX_TOKENS", "400"))
 
 DEFAULT_CONTEXT = textwrap.dedent(
     """
@@ -74,25 +87,22 @@ class InsightPromptBuilder:
         ).strip()
 
 
-def _invoke_titan(client, prompt: str, model_id: str) -> str:
-    body = {
+def _titan_body(prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> Dict[str, Any]:
+    return {
         "inputText": prompt,
         "textGenerationConfig": {
-            "maxTokenCount": 800,
+            "maxTokenCount": max_tokens,
             "temperature": 0.3,
             "topP": 0.9,
             "topK": 50,
         },
     }
-    response = client.invoke_model(modelId=model_id, body=json.dumps(body))
-    payload = json.loads(response["body"].read())
-    return payload["results"][0]["outputText"].strip()
 
 
-def _invoke_claude(client, prompt: str, model_id: str) -> str:
-    body = {
+def _claude_body(prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> Dict[str, Any]:
+    return {
         "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 800,
+        "max_tokens": max_tokens,
         "temperature": 0.2,
         "messages": [
             {
@@ -106,6 +116,19 @@ def _invoke_claude(client, prompt: str, model_id: str) -> str:
             }
         ],
     }
+
+
+def _invoke_titan(client, prompt: str, model_id: str,
+                  max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    body = _titan_body(prompt, max_tokens)
+    response = client.invoke_model(modelId=model_id, body=json.dumps(body))
+    payload = json.loads(response["body"].read())
+    return payload["results"][0]["outputText"].strip()
+
+
+def _invoke_claude(client, prompt: str, model_id: str,
+                   max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    body = _claude_body(prompt, max_tokens)
     response = client.invoke_model(modelId=model_id, body=json.dumps(body))
     payload = json.loads(response["body"].read())
     text_segments = [block.get("text", "")
@@ -113,6 +136,32 @@ def _invoke_claude(client, prompt: str, model_id: str) -> str:
     return "\n".join(segment for segment in text_segments if segment).strip()
 
 
+def _stream_chunks(client, model_id: str, body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    response = client.invoke_model_with_response_stream(
+        modelId=model_id, body=json.dumps(body))
+    for event in response["body"]:
+        chunk = event.get("chunk")
+        if chunk:
+            yield json.loads(chunk["bytes"])
+
+
+def _stream_titan(client, prompt: str, model_id: str,
+                  max_tokens: int = DEFAULT_MAX_TOKENS) -> Iterator[str]:
+    for payload in _stream_chunks(client, model_id, _titan_body(prompt, max_tokens)):
+        text = payload.get("outputText")
+        if text:
+            yield text
+
+
+def _stream_claude(client, prompt: str, model_id: str,
+                   max_tokens: int = DEFAULT_MAX_TOKENS) -> Iterator[str]:
+    for payload in _stream_chunks(client, model_id, _claude_body(prompt, max_tokens)):
+        if payload.get("type") == "content_block_delta":
+            text = payload.get("delta", {}).get("text")
+            if text:
+                yield text
+
+
 def _offline_response(model_name: str, prompt: str) -> str:
     snippet = prompt.strip().splitlines()[:6]
     snippet_text = " ".join(line.strip() for line in snippet)
@@ -126,6 +175,83 @@ def _offline_response(model_name: str, prompt: str) -> str:
     ).strip()
 
 
+@dataclass(frozen=True)
+class ModelTarget:
+    """One model to query: result key, display label, model id and invokers."""
+
+    key: str
+    label: str
+    model_id: str
+    invoke: Callable[[Any, str, str], str]
+    timeout: float = DEFAULT_MODEL_TIMEOUT
+    stream: Optional[Callable[[Any, str, str], Iterator[str]]] = None
+
+
+def default_targets(
+    claude_model: str = DEFAULT_CLAUDE_MODEL,
+    titan_model: str = DEFAULT_TITAN_MODEL,
+    timeout: float = DEFAULT_MODEL_TIMEOUT,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> List[ModelTarget]:
+    def bind(fn):
+        return functools.partial(fn, max_tokens=max_tokens)
+
+    return [
+        ModelTarget("titan", "Amazon Titan", titan_model, bind(_invoke_titan),
+                    timeout, bind(_stream_titan)),
+        ModelTarget("claude", "Claude", claude_model, bind(_invoke_claude),
+                    timeout, bind(_stream_claude)),
+    ]
+
+
+def _invoke_into(target: ModelTarget, client, prompt: str, results: queue.Queue) -> None:
+    try:
+        results.put((target, target.invoke(client, prompt, target.model_id), None))
+    except BaseException as exc:  # reported or re-raised by iter_insights
+        results.put((target, None, exc))
+
+
+def iter_insights(
+    client, prompt: str, targets: List[ModelTarget]
+) -> Iterator[Tuple[str, str]]:
+    """Invoke every target concurrently, yielding ``(key, text)`` as each finishes.
+
+    Bedrock errors and per-model timeouts are reported in the text rather than
+    raised, so one slow or failing model never hides the others' results.
+    Calls run on daemon threads: a timed-out call is abandoned, not joined, so
+    it holds up neither the other results nor interpreter exit (a thread pool
+    would join it at shutdown, for up to the client's read timeout).
+    """
+    results: queue.Queue = queue.Queue()
+    for target in targets:
+        threading.Thread(target=_invoke_into, args=(target, client, prompt, results),
+                         name=f"bedrock-{target.key}", daemon=True).start()
+
+    started = time.monotonic()
+    pending = {target.key: target for target in targets}
+    while pending:
+        deadline = min(started + t.timeout for t in pending.values())
+        try:
+            target, text, exc = results.get(
+                timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            pass
+        else:
+            if pending.pop(target.key, None) is not None:
+                if exc is None:
+                    yield target.key, text
+                elif isinstance(exc, aws_errors()):
+                    yield target.key, f"[Error calling {target.label}: {exc}]"
+                else:
+                    raise exc
+        now = time.monotonic()
+        for key, target in list(pending.items()):
+            if now >= started + target.timeout:
+                del pending[key]
+                yield key, (f"[Timeout calling {target.label} after "
+                            f"{target.timeout:g}s]")
+
+
 def generate_insights(
     context: str,
     *,
@@ -133,6 +259,11 @@ def generate_insights(
     claude_model: str = DEFAULT_CLAUDE_MODEL,
     titan_model: str = DEFAULT_TITAN_MODEL,
     offline: bool = False,
+    client=None,
+    timeout: float = DEFAULT_MODEL_TIMEOUT,
+    extra_targets: Optional[List[ModelTarget]] = None,
+    cache: Optional[ResponseCache] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
 ) -> Dict[str, str]:
     builder = InsightPromptBuilder()
     prompt = builder.render(context)
@@ -144,35 +275,175 @@ def generate_insights(
             "titan": _offline_response("Titan", prompt),
         }
 
-    client = boto3.client("bedrock-runtime", region_name=region)
-
-    def safe_call(name: str, fn):
+    if client is None:
+        client = get_bedrock_client(region, read_timeout=max(DEFAULT_READ_TIMEOUT, timeout))
+    if cache is not None:
+        client = CachingClient(client, cache)
+
+    targets = default_targets(claude_model, titan_model, timeout, max_tokens)
+    targets.extend(extra_targets or ())
+    results = {"prompt": prompt}
+    results.update(iter_insights(client, prompt, targets))
+    return results
+
+
+def _pump_stream(target: ModelTarget, client, prompt: str,
+                 events: "queue.Queue[Tuple[str, Optional[str]]]") -> None:
+    try:
+        if target.stream is None:
+            events.put((target.key, target.invoke(client, prompt, target.model_id)))
+        else:
+            for text in target.stream(client, prompt, target.model_id):
+                events.put((target.key, text))
+    except Exception as exc:  # report any failure; never end the stream silently
+        events.put((target.key, f"[Error calling {target.label}: {exc}]"))
+    finally:
+        events.put((target.key, None))
+
+
+def stream_insights(
+    context: str,
+    *,
+    region: str = BEDROCK_REGION,
+    claude_model: str = DEFAULT_CLAUDE_MODEL,
+    titan_model: str = DEFAULT_TITAN_MODEL,
+    offline: bool = False,
+    client=None,
+    timeout: float = DEFAULT_MODEL_TIMEOUT,
+    extra_targets: Optional[List[ModelTarget]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """Stream text deltas from every model concurrently.
+
+    Yields ``(key, text)`` as tokens arrive (keys interleave between models)
+    and ``(key, None)`` once a model is finished. Each model has its own
+    inactivity deadline: one that produces nothing for its ``timeout``
+    seconds is reported as timed out, however busy the others are.
+    Responses are not cached in this mode.
+    """
+    prompt = InsightPromptBuilder().render(context)
+    if offline:
+        for key, name in (("titan", "Titan"), ("claude", "Claude")):
+            yield key, _offline_response(name, prompt)
+            yield key, None
+        return
+
+    if client is None:
+        client = get_bedrock_client(region, read_timeout=max(DEFAULT_READ_TIMEOUT, timeout))
+    targets = default_targets(claude_model, titan_model, timeout, max_tokens)
+    targets.extend(extra_targets or ())
+    events: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+    for target in targets:
+        threading.Thread(target=_pump_stream, args=(target, client, prompt, events),
+                         name=f"bedrock-stream-{target.key}", daemon=True).start()
+
+    remaining = {target.key: target for target in targets}
+    started = time.monotonic()
+    deadlines = {target.key: started + target.timeout for target in targets}
+    while remaining:
         try:
-            return fn()
-        except (BotoCoreError, ClientError) as exc:
-            return f"[Error calling {name}: {exc}]"
+            key, text = events.get(
+                timeout=max(0.0, min(deadlines.values()) - time.monotonic()))
+        except queue.Empty:
+            now = time.monotonic()
+            for key, target in list(remaining.items()):
+                if now >= deadlines[key]:
+                    del remaining[key], deadlines[key]
+                    yield key, f"[Timeout calling {target.label} after {target.timeout:g}s]"
+                    yield key, None
+            continue
+        if key not in remaining:
+            continue
+        if text is None:
+            del remaining[key], deadlines[key]
+        else:
+            deadlines[key] = time.monotonic() + remaining[key].timeout
+        yield key, text
+
+
+def _print_stream(events: Iterator[Tuple[str, Optional[str]]],
+                  labels: Dict[str, str]) -> None:
+    current = None
+    for key, text in events:
+        if text is None:
+            continue
+        if key != current:
+            print(f"\n\n[{labels.get(key, key)}]", flush=True)
+            current = key
+        print(text, end="", flush=True)
+    print()
+
+
+CHUNK_SUMMARY_PROMPT = textwrap.dedent(
+    """
+    The text below is one part of a larger system context (architecture notes,
+    manifests or logs). Summarize it in dense bullet points, keeping service
+    names, error messages, counts, configuration values and anything relevant
+    to telemetry, resiliency, containers/Kubernetes/Dapr or SNS/SQS scaling.
 
-    titan_output = safe_call(
-        "Amazon Titan",
-        lambda: _invoke_titan(client, prompt=prompt, model_id=titan_model),
-    )
-    claude_output = safe_call(
-        "Claude",
-        lambda: _invoke_claude(client, prompt=prompt, model_id=claude_model),
-    )
+    Part:
+    {chunk}
+    """
+).strip()
+
+
+def summarize_chunk(client, chunk: str, *, model_id: str = DEFAULT_CLAUDE_MODEL,
+                    max_tokens: int = CHUNK_SUMMARY_MAX_TOKENS) -> str:
+    """Map step: condense one context chunk with Claude."""
+    prompt = CHUNK_SUMMARY_PROMPT.format(chunk=chunk)
+    try:
+        return _invoke_claude(client, prompt, model_id, max_tokens=max_tokens)
+    except aws_errors() as exc:
+        return f"[Summary unavailable: {exc}]\n{chunk[: max_tokens * 4]}"
 
-    return {"prompt": prompt, "claude": claude_output, "titan": titan_output}
 
+def _offline_summary(chunk: str) -> str:
+    lines = [line.strip() for line in chunk.splitlines() if line.strip()]
+    return "\n".join(lines[:5])
 
-def _load_context_from_args(args: argparse.Namespace) -> str:
+
+def _context_summarizer(args: argparse.Namespace, client) -> Callable[[str], str]:
+    if args.offline:
+        return _offline_summary
+    return functools.partial(summarize_chunk, client, model_id=args.claude_model)
+
+
+def _load_context_from_args(args: argparse.Namespace, client=None) -> str:
+    budget = args.context_budget
+    summarize = _context_summarizer(args, client)
     if args.context_file:
         path = Path(args.context_file)
         if not path.exists():
             raise FileNotFoundError(f"Context file not found: {path}")
-        return path.read_text()
-    if args.context:
-        return args.context
-    return DEFAULT_CONTEXT
+        chunks = read_chunks(path, budget)
+    elif args.context:
+        chunks = iter_chunks(args.context.splitlines(keepends=True), budget)
+    else:
+        return DEFAULT_CONTEXT
+    return map_reduce_context(chunks, summarize, workers=args.workers,
+                              max_tokens=budget)
+
+
+def _client_from_args(args: argparse.Namespace, *, throttled: bool = False):
+    """Return ``(client, cache)`` for a live run, or ``(None, None)`` offline."""
+    if args.offline:
+        return None, None
+    client = get_bedrock_client(
+        args.region,
+        # Batch runs up to ``workers`` files, each with one call per model plus
+        # chunk summaries, all sharing this client's pool.
+        max_pool_connections=max(DEFAULT_MAX_POOL_CONNECTIONS, 3 * args.workers),
+        read_timeout=max(DEFAULT_READ_TIMEOUT, args.timeout),
+        # ThrottledClient retries throttles itself; botocore retrying under
+        # it too would multiply the calls made per request.
+        **({"max_attempts": 1} if throttled else {}),
+    )
+    if throttled:
+        client = ThrottledClient(client, AdaptiveRateLimiter())
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_dir, refresh=args.refresh)
+    return client, cache
 
 
 def _format_output(results: Dict[str, str]) -> str:
@@ -184,6 +455,44 @@ def _format_output(results: Dict[str, str]) -> str:
     )
 
 
+def _run_batch_from_args(args: argparse.Namespace) -> int:
+    paths = expand_context_paths(args.batch)
+    if not paths:
+        raise FileNotFoundError(f"No context files matched: {args.batch}")
+    client, cache = _client_from_args(args, throttled=True)
+    summarize = _context_summarizer(
+        args, CachingClient(client, cache) if cache is not None else client)
+
+    def load(path: Path) -> str:
+        return map_reduce_context(read_chunks(path, args.context_budget),
+                                  summarize, workers=args.workers,
+                                  max_tokens=args.context_budget)
+
+    def generate(context: str) -> Dict[str, str]:
+        return generate_insights(
+            context,
+            region=args.region,
+            claude_model=args.claude_model,
+            titan_model=args.titan_model,
+            offline=args.offline,
+            client=client,
+            timeout=args.timeout,
+            cache=cache,
+            max_tokens=args.max_tokens,
+        )
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        summary = run_batch(paths, generate, out, workers=args.workers, load=load)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Batch: {summary['files']} files ({summary['failed']} failed) in "
+          f"{summary['wall_seconds']}s wall, {summary['sum_item_seconds']}s "
+          f"summed across items", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(
         description="Run Bedrock insight prompts.")
@@ -210,22 +519,110 @@ def main(argv: Optional[List[str]] = None) -> int:
         default=DEFAULT_TITAN_MODEL,
         help="Amazon Titan model ID (Bedrock).",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_MODEL_TIMEOUT,
+        help=f"Per-model timeout in seconds (default: {DEFAULT_MODEL_TIMEOUT:g}).",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=DEFAULT_MAX_TOKENS,
+        help=f"Maximum tokens per model response (default: {DEFAULT_MAX_TOKENS}).",
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=DEFAULT_CONTEXT_TOKEN_BUDGET,
+        help="Estimated tokens per context chunk; larger inputs are summarized "
+        f"chunk by chunk first (default: {DEFAULT_CONTEXT_TOKEN_BUDGET}).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Response cache directory (default: {DEFAULT_CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call Bedrock; do not read or write the response cache.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses but store the fresh ones.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="DIR_OR_GLOB",
+        help="Generate insights for every context file in a directory or glob; "
+        "writes one JSON line per file.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent context files in --batch mode and concurrent chunk "
+        "summaries for large contexts (default: 4).",
+    )
+    parser.add_argument(
+        "--output",
+        help="JSONL output path for --batch mode (default: stdout).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print model output incrementally as tokens arrive (no caching).",
+    )
     parser.add_argument(
         "--offline",
         action="store_true",
         help="Do not call AWS; emit offline placeholder responses.",
     )
     args = parser.parse_args(argv)
+    if args.batch and args.stream:
+        parser.error("--stream cannot be combined with --batch")
+
+    if args.batch:
+        return _run_batch_from_args(args)
+
+    client, cache = _client_from_args(args)
+    cached_client = CachingClient(client, cache) if cache is not None else client
+    context = _load_context_from_args(args, cached_client)
+    if args.stream:
+        print(f"Prompt\n------\n{InsightPromptBuilder().render(context)}")
+        _print_stream(
+            stream_insights(
+                context,
+                region=args.region,
+                claude_model=args.claude_model,
+                titan_model=args.titan_model,
+                offline=args.offline,
+                client=client,
+                timeout=args.timeout,
+                max_tokens=args.max_tokens,
+            ),
+            {"claude": "Claude Response", "titan": "Amazon Titan Response"},
+        )
+        return 0
 
-    context = _load_context_from_args(args)
     results = generate_insights(
         context,
         region=args.region,
         claude_model=args.claude_model,
         titan_model=args.titan_model,
         offline=args.offline,
+        client=client,
+        timeout=args.timeout,
+        cache=cache,
+        max_tokens=args.max_tokens,
     )
     print(_format_output(results))
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({args.cache_dir})", file=sys.stderr)
     return 0
 
 
@@ -1,4 +1,34 @@
-from tools.bedrock_insights.insights import InsightPromptBuilder, generate_insights
+import argparse
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from tools.bedrock_insights import insights
+from tools.bedrock_insights.batch import AdaptiveRateLimiter, ThrottledClient, run_batch
+from tools.bedrock_insights.cache import ResponseCache, cache_key
+from tools.bedrock_insights.chunking import (
+    estimate_tokens,
+    iter_chunks,
+    map_reduce_context,
+    read_chunks,
+)
+from tools.bedrock_insights.client import clear_client_cache, get_bedrock_client
+from tools.bedrock_insights.insights import (
+    InsightPromptBuilder,
+    ModelTarget,
+    _claude_body,
+    default_targets,
+    generate_insights,
+    iter_insights,
+    main,
+    stream_insights,
+    summarize_chunk,
+)
 
 
 def test_prompt_builder_includes_context_and_focus():
@@ -16,3 +46,408 @@ def test_generate_insights_offline_returns_placeholders():
     assert "prompt" in results
     assert results["claude"].startswith("[Claude OFFLINE SAMPLE]")
     assert results["titan"].startswith("[Titan OFFLINE SAMPLE]")
+
+
+class _StubBedrock:
+    """Fake bedrock-runtime client that sleeps per model before answering."""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    def invoke_model(self, modelId, body):
+        time.sleep(self.delays.get(modelId, 0))
+        if modelId.startswith("amazon.titan"):
+            payload = {"results": [{"outputText": f"titan:{modelId}"}]}
+        else:
+            payload = {"content": [{"type": "text", "text": f"claude:{modelId}"}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+class _RendezvousBedrock(_StubBedrock):
+    """Answers only once every model's call is in flight at the same time."""
+
+    def __init__(self, parties):
+        super().__init__({})
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def invoke_model(self, modelId, body):
+        self.barrier.wait()  # BrokenBarrierError if the calls run one by one
+        return super().invoke_model(modelId, body)
+
+
+def test_generate_insights_invokes_models_concurrently():
+    client = _RendezvousBedrock(2)
+    results = generate_insights("ctx", client=client, titan_model="amazon.titan-x",
+                                claude_model="anthropic.claude-x")
+
+    assert results["titan"] == "titan:amazon.titan-x"
+    assert results["claude"] == "claude:anthropic.claude-x"
+
+
+def test_iter_insights_yields_fastest_first_and_times_out_slow_models():
+    client = _StubBedrock({"amazon.titan-x": 0.05, "anthropic.claude-x": 30.0})
+    targets = default_targets("anthropic.claude-x", "amazon.titan-x", timeout=0.3)
+    start = time.perf_counter()
+    results = list(iter_insights(client, "prompt", targets))
+
+    assert results[0] == ("titan", "titan:amazon.titan-x")
+    assert results[1] == ("claude", "[Timeout calling Claude after 0.3s]")
+    # Far below the hung call's 30 s, so the timeout, not the call, ended it.
+    assert time.perf_counter() - start < 10
+
+
+def test_iter_insights_does_not_hold_up_interpreter_exit():
+    # The abandoned call sleeps far longer than the subprocess is allowed to run.
+    script = (
+        "import time\n"
+        "from tools.bedrock_insights.insights import default_targets, iter_insights\n"
+        "class Hung:\n"
+        "    def invoke_model(self, modelId, body):\n"
+        "        time.sleep(60)\n"
+        "targets = default_targets('anthropic.claude-x', 'amazon.titan-x', timeout=0.1)\n"
+        "print(len(list(iter_insights(Hung(), 'prompt', targets))))\n"
+    )
+    done = subprocess.run([sys.executable, "-c", script], capture_output=True,
+                          text=True, timeout=30)
+
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.strip() == "2"
+
+
+def test_response_cache_serves_repeat_calls(tmp_path):
+    client = _StubBedrock({})
+    cache = ResponseCache(tmp_path)
+    kwargs = dict(client=client, titan_model="amazon.titan-x",
+                  claude_model="anthropic.claude-x", cache=cache)
+
+    first = generate_insights("ctx", **kwargs)
+    second = generate_insights("ctx", **kwargs)
+
+    assert first == second
+    assert cache.stats() == {"hits": 2, "misses": 2}
+
+
+def test_response_cache_expires_and_evicts(tmp_path):
+    cache = ResponseCache(tmp_path, ttl_seconds=0)
+    cache.put("a", "m", b"{}")
+    assert cache.get("a") is None
+
+    cache = ResponseCache(tmp_path, max_bytes=150)
+    for key in ("k1", "k2", "k3"):
+        cache.put(key, "m", b'{"text": "' + b"x" * 40 + b'"}')
+    assert not (tmp_path / "k1.json").exists()
+    assert cache.get("k3") is not None
+
+
+def test_response_cache_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    cache.put("a", "m", b"{}")
+
+    def evicted(path, *args):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr("tools.bedrock_insights.cache.os.utime", evicted)
+    assert cache.get("a") == b"{}"
+
+
+def test_throttled_batch_client_disables_sdk_retries(monkeypatch):
+    calls = []
+    monkeypatch.setattr(insights, "get_bedrock_client",
+                        lambda region, **kwargs: calls.append(kwargs) or object())
+    args = argparse.Namespace(offline=False, region="us-east-1", workers=4,
+                              timeout=60, no_cache=True)
+
+    client, _ = insights._client_from_args(args, throttled=True)
+    insights._client_from_args(args)
+
+    assert isinstance(client, ThrottledClient)
+    assert calls[0]["max_attempts"] == 1
+    assert "max_attempts" not in calls[1]
+
+
+def test_cache_key_depends_on_model_and_body():
+    assert cache_key("m1", "body") != cache_key("m2", "body")
+    assert cache_key("m1", "body") != cache_key("m1", "body2")
+    assert cache_key("m1", "body") == cache_key("m1", b"body")
+
+
+class _StubStreamingBedrock(_StubBedrock):
+    """Adds a fake response event stream emitting one chunk per token.
+
+    With ``gate``, the tokens after the first wait until the gate is set;
+    ``finished`` lists the models whose stream has ended.
+    """
+
+    def __init__(self, tokens, gate=None):
+        super().__init__({})
+        self.tokens = tokens
+        self.gate = gate
+        self.finished = []
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        def events():
+            for i, token in enumerate(self.tokens):
+                if i and self.gate is not None:
+                    self.gate.wait(5)
+                if modelId.startswith("amazon.titan"):
+                    payload = {"outputText": token, "index": 0}
+                else:
+                    payload = {"type": "content_block_delta", "index": 0,
+                               "delta": {"type": "text_delta", "text": token}}
+                yield {"chunk": {"bytes": json.dumps(payload).encode()}}
+            if not modelId.startswith("amazon.titan"):
+                yield {"chunk": {"bytes": b'{"type": "message_stop"}'}}
+            self.finished.append(modelId)
+
+        return {"body": events()}
+
+
+def test_stream_insights_yields_tokens_per_model():
+    client = _StubStreamingBedrock(["Hello", " world"])
+    events = list(stream_insights("ctx", client=client,
+                                  titan_model="amazon.titan-x",
+                                  claude_model="anthropic.claude-x"))
+    by_model = {}
+    for key, text in events:
+        by_model.setdefault(key, []).append(text)
+
+    assert by_model["titan"] == ["Hello", " world", None]
+    assert by_model["claude"] == ["Hello", " world", None]
+
+
+def test_stream_insights_first_token_arrives_before_completion():
+    gate = threading.Event()
+    client = _StubStreamingBedrock(["a", "b", "c", "d"], gate=gate)
+    stream = stream_insights("ctx", client=client, titan_model="amazon.titan-x",
+                             claude_model="anthropic.claude-x")
+
+    # Both models are held after their first token until the gate opens.
+    assert next(stream)[1] == "a"
+    assert client.finished == []
+    gate.set()
+    rest = [text for _, text in stream if text is not None]
+
+    assert sorted(rest) == ["a", "b", "b", "c", "c", "d", "d"]
+    assert sorted(client.finished) == ["amazon.titan-x", "anthropic.claude-x"]
+
+
+def test_stream_insights_times_out_each_model_on_its_own():
+    hung = threading.Event()
+
+    def busy_stream(client, prompt, model_id):
+        for _ in range(20):
+            time.sleep(0.05)
+            yield "tick"
+
+    def hung_stream(client, prompt, model_id):
+        hung.wait(5)
+        yield "late"
+
+    def broken_stream(client, prompt, model_id):
+        raise RuntimeError("decoder crashed")
+        yield  # pragma: no cover
+
+    targets = [
+        ModelTarget("busy", "Busy", "m", None, timeout=0.5, stream=busy_stream),
+        ModelTarget("hung", "Hung", "m", None, timeout=0.3, stream=hung_stream),
+        ModelTarget("broken", "Broken", "m", None, timeout=0.5, stream=broken_stream),
+    ]
+    try:
+        events = list(stream_insights(
+            "ctx", client=_StubStreamingBedrock(["x"]), titan_model="amazon.titan-x",
+            claude_model="anthropic.claude-x", extra_targets=targets))
+    finally:
+        hung.set()
+
+    by_model = {}
+    for key, text in events:
+        by_model.setdefault(key, []).append(text)
+    assert by_model["hung"] == ["[Timeout calling Hung after 0.3s]", None]
+    # The hung model timed out while the busy one was still sending tokens.
+    assert events.index(("hung", None)) < events.index(("busy", None))
+    assert by_model["busy"].count("tick") == 20
+    assert by_model["broken"] == ["[Error calling Broken: decoder crashed]", None]
+
+
+def test_batch_mode_writes_jsonl_per_context_file(tmp_path, capsys):
+    for name in ("orders.md", "products.md", "notes.bin"):
+        (tmp_path / name).write_text(f"context for {name}")
+    out = tmp_path / "out.jsonl"
+
+    assert main(["--offline", "--batch", str(tmp_path), "--output", str(out)]) == 0
+
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    files = sorted(r["context_file"] for r in records if "context_file" in r)
+    assert files == [str(tmp_path / "orders.md"), str(tmp_path / "products.md")]
+    assert all("elapsed_seconds" in r for r in records if "context_file" in r)
+    assert records[-1]["summary"]["files"] == 2
+
+
+def test_run_batch_counts_model_errors_and_timeouts_as_failed(tmp_path):
+    paths = [tmp_path / "a.md", tmp_path / "b.md"]
+    for path in paths:
+        path.write_text("ctx")
+
+    def generate(context):
+        return {"prompt": context, "titan": "ok",
+                "claude": "[Timeout calling Claude after 120s]"}
+
+    out = io.StringIO()
+    summary = run_batch(paths, generate, out)
+
+    assert summary["failed"] == 2
+    records = [json.loads(line) for line in out.getvalue().splitlines()[:-1]]
+    assert all(r["failed_models"] == ["claude"] for r in records)
+
+
+def test_batch_rejects_stream(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["--offline", "--batch", str(tmp_path), "--stream"])
+    assert "--stream cannot be combined with --batch" in capsys.readouterr().err
+
+
+def test_run_batch_is_bounded_and_concurrent(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"ctx{i}.md"
+        path.write_text(str(i))
+        paths.append(path)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def generate(context):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return {"prompt": context, "claude": context, "titan": context}
+
+    summary = run_batch(paths, generate, io.StringIO(), workers=3)
+
+    assert peak[0] == 3
+    assert summary["wall_seconds"] < summary["sum_item_seconds"]
+
+
+def test_throttled_client_backs_off_and_retries(monkeypatch):
+    ClientError = pytest.importorskip("botocore.exceptions").ClientError
+
+    class Flaky:
+        calls = 0
+
+        def invoke_model(self, **kwargs):
+            Flaky.calls += 1
+            if Flaky.calls < 3:
+                raise ClientError({"Error": {"Code": "ThrottlingException",
+                                             "Message": "slow down"}},
+                                  "InvokeModel")
+            return {"ok": True}
+
+    # Full jitter at its upper bound, so the backoff sleeps are exact.
+    monkeypatch.setattr("tools.bedrock_insights.batch.random.uniform", lambda a, b: b)
+    sleeps = []
+    limiter = AdaptiveRateLimiter(sleep=sleeps.append)
+    client = ThrottledClient(Flaky(), limiter, base_backoff=0.01)
+
+    assert client.invoke_model(modelId="m", body="{}") == {"ok": True}
+    assert limiter.throttles == 2
+    assert limiter.interval > 0
+    # Exponential backoff after each throttle, then pacing before the last try.
+    assert sleeps[:2] == [0.01, 0.02]
+    assert len(sleeps) == 3 and 0 < sleeps[2] <= limiter.min_step
+
+
+def test_iter_chunks_respects_token_budget():
+    lines = [f"line {i:03d}\n" for i in range(100)]  # 9 chars each
+    chunks = list(iter_chunks(lines, max_tokens=10))  # 40 chars per chunk
+
+    assert "".join(chunks) == "".join(lines)
+    assert all(estimate_tokens(chunk) <= 10 for chunk in chunks)
+    assert list(iter_chunks(["x" * 100], max_tokens=10)) == ["x" * 40, "x" * 40, "x" * 20]
+
+
+def test_map_reduce_context_summarizes_chunks_in_order(tmp_path):
+    path = tmp_path / "big.log"
+    path.write_text("".join(f"event {i}\n" for i in range(50)))
+
+    def summarize(chunk):
+        time.sleep(0.01)
+        return chunk
+
+    context = map_reduce_context(read_chunks(path, max_tokens=20), summarize)
+
+    assert context.startswith("[Part 1 of")
+    assert context.index("event 0\n") < context.index("event 25") < context.index("event 49")
+    assert map_reduce_context(iter(["small"]), summarize) == "small"
+
+
+def test_map_reduce_context_reduces_summaries_until_within_budget():
+    lines = [f"event {i} " + "x" * 30 + "\n" for i in range(400)]
+    calls = []
+
+    def summarize(chunk):
+        calls.append(chunk)
+        return chunk[:40]
+
+    context = map_reduce_context(iter_chunks(lines, max_tokens=50), summarize,
+                                 max_tokens=50)
+
+    assert estimate_tokens(context) <= 50
+    # More first-level summaries than fit in one prompt: reduced again.
+    assert len(calls) > len(list(iter_chunks(lines, max_tokens=50)))
+    with pytest.raises(ValueError):
+        map_reduce_context(iter_chunks(lines, max_tokens=50), lambda c: c,
+                           max_tokens=50)
+
+
+def test_large_context_is_summarized_before_final_prompt():
+    client = _StubBedrock({})
+    results = generate_insights(
+        map_reduce_context(
+            iter_chunks(["a" * 100 + "\n"] * 4, max_tokens=30),
+            lambda chunk: summarize_chunk(client, chunk, model_id="anthropic.claude-x"),
+        ),
+        client=client,
+        titan_model="amazon.titan-x",
+        claude_model="anthropic.claude-x",
+        max_tokens=123,
+    )
+
+    assert results["prompt"].count("claude:anthropic.claude-x") == 4
+    assert json.loads(json.dumps(_claude_body("p", 123)))["max_tokens"] == 123
+
+
+def test_bedrock_client_is_shared_per_region_and_config():
+    clear_client_cache()
+    try:
+        first = get_bedrock_client("us-east-1", max_pool_connections=8,
+                                   connect_timeout=2, read_timeout=30)
+        again = get_bedrock_client("us-east-1", max_pool_connections=8,
+                                   connect_timeout=2, read_timeout=30)
+        other = get_bedrock_client("us-west-2", max_pool_connections=8,
+                                   connect_timeout=2, read_timeout=30)
+
+        assert first is again
+        assert other is not first
+        config = first.meta.config
+        assert config.max_pool_connections == 8
+        assert config.connect_timeout == 2
+        assert config.read_timeout == 30
+        assert config.retries["mode"] == "adaptive"
+    finally:
+        clear_client_cache()
+
+
+def test_offline_cli_does_not_import_aws_sdk():
+    code = (
+        "import sys\n"
+        "from tools.bedrock_insights.insights import main\n"
+        "main(['--offline', '--no-cache', '--context', 'ctx'])\n"
+        "print(sorted(m for m in sys.modules if m.startswith(('boto3', 'botocore'))),"
+        " file=sys.stderr)\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                          text=True, check=True)
+
+    assert proc.stderr.strip().splitlines()[-1] == "[]"